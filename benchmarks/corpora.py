@@ -0,0 +1,170 @@
+"""MystBin. Share code easily.
+
+Copyright (C) 2020-Current PythonistaGuild
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from __future__ import annotations
+
+import base64
+import random
+import string
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+
+__all__ = ("CORPORA", "generate")
+
+TOKEN_CHARS = string.ascii_letters + string.digits + "_-"
+WORDS = (
+    "def", "class", "return", "self", "import", "from", "async", "await", "for", "in", "if", "else", "None", "True",
+    "paste", "files", "content", "identifier", "database", "connection", "record", "config", "session", "request",
+)  # fmt: skip
+
+
+def _discord_token(rng: random.Random) -> str:
+    user_id: str = base64.b64encode(str(rng.randrange(10**17, 10**19)).encode()).decode().rstrip("=")
+    return f"{user_id}.{''.join(rng.choices(TOKEN_CHARS, k=6))}.{''.join(rng.choices(TOKEN_CHARS, k=rng.randint(27, 38)))}"
+
+
+def _github_token(rng: random.Random) -> str:
+    return rng.choice(("ghp", "gho", "ghu", "ghs", "ghr")) + "_" + "".join(rng.choices(string.ascii_letters + "_", k=36))
+
+
+def _pypi_token(rng: random.Random) -> str:
+    return "pypi-AgEIcHlwaS5vcmc" + "".join(rng.choices(TOKEN_CHARS, k=rng.randint(70, 120)))
+
+
+def code(rng: random.Random, size: int, /) -> str:
+    # Python-like source with indentation, calls and the occasional secret.
+    lines: list[str] = []
+    length: int = 0
+
+    while length < size:
+        indent: str = "    " * rng.randint(0, 3)
+        words: str = " ".join(rng.choices(WORDS, k=rng.randint(1, 8)))
+        line: str = f"{indent}{words}({rng.choice(WORDS)}.{rng.choice(WORDS)}, {rng.randint(0, 1000)})"
+
+        if rng.random() < 0.001:
+            line += f'  # "{rng.choice((_discord_token, _github_token, _pypi_token))(rng)}"'
+
+        lines.append(line)
+        length += len(line) + 1
+
+    return "\n".join(lines)[:size]
+
+
+def minified(rng: random.Random, size: int, /) -> str:
+    # Minified JavaScript: one long line of short identifiers and punctuation.
+    parts: list[str] = []
+    length: int = 0
+
+    while length < size:
+        name: str = "".join(rng.choices(string.ascii_letters, k=rng.randint(1, 3)))
+        part: str = rng.choice((f"var {name}=", f"{name}.{name}(", "function(){", "return ", "};", f'"{name}",', "0x1f,"))
+        parts.append(part)
+        length += len(part)
+
+    return "".join(parts)[:size]
+
+
+def blobs(rng: random.Random, size: int, /) -> str:
+    # Base64 encoded binary data wrapped at 76 characters.
+    data: str = base64.b64encode(rng.randbytes(size)).decode()
+    return "\n".join(data[i : i + 76] for i in range(0, len(data), 76))[:size]
+
+
+def markup(rng: random.Random, size: int, /) -> str:
+    # HTML and XML fragments with attributes, entities, comments and comparisons that only look like tags.
+    tags: tuple[str, ...] = ("div", "span", "a", "p", "script", "T", "List", "stdio.h")
+    generators: tuple[Callable[[], str], ...] = (
+        lambda: f'<{rng.choice(tags)} class="{rng.choice(WORDS)}" id={rng.choice(WORDS)}>',
+        lambda: f"</{rng.choice(tags)}>",
+        lambda: f"<{rng.choice(tags)}/>",
+        lambda: rng.choice(("&amp;", "&lt;", "&copy;", "&#65;", "&#x41;", "&nbsp", "&&", "&unknown;", "&#xa;")),
+        lambda: rng.choice(("<!-- comment -->", "<!DOCTYPE html>", '<?xml version="1.0"?>', "</ 1>", "<>")),
+        lambda: rng.choice(("a < b", "a<b", "x <= y", "if a<b && c>d:", "Vec<u8>", "i<n; i++")),
+        lambda: " ".join(rng.choices(WORDS, k=rng.randint(1, 12))),
+    )
+
+    parts: list[str] = []
+    length: int = 0
+
+    while length < size:
+        part: str = rng.choice(generators)() + rng.choice(("", " ", "\n", "\n    "))
+        parts.append(part)
+        length += len(part)
+
+    return "".join(parts)[:size]
+
+
+def near_misses(rng: random.Random, size: int, /) -> str:
+    # Adversarial content: long token-like runs that almost, but do not, match.
+    generators: tuple[Callable[[], str], ...] = (
+        # Discord: segments one character too short or too long...
+        lambda: f"{'a' * 22}.{'b' * 6}.{'c' * 40}",
+        lambda: f"{'a' * 25}.{'b' * 8}.{'c' * 40}",
+        lambda: f"{'a' * 25}.{'b' * 6}.{'c' * 26}",
+        # Discord: long runs with dots spaced so every start position is attempted...
+        lambda: ".".join("".join(rng.choices(TOKEN_CHARS, k=rng.randint(5, 30))) for _ in range(rng.randint(5, 40))),
+        # Discord: a valid shape with an invalid user id...
+        lambda: f"{'_' * 24}.{'b' * 6}.{'c' * 30}",
+        # GitHub and PyPI: one character short...
+        lambda: "ghp_" + "".join(rng.choices(string.ascii_letters, k=35)) + " ",
+        lambda: "pypi-AgEIcHlwaS5vcmc" + "".join(rng.choices(TOKEN_CHARS, k=69)) + " ",
+        # Unbounded run of token characters...
+        lambda: "".join(rng.choices(TOKEN_CHARS, k=rng.randint(100, 4000))),
+    )
+
+    parts: list[str] = []
+    length: int = 0
+
+    while length < size:
+        part: str = rng.choice(generators)() + rng.choice((" ", "\n", "."))
+        parts.append(part)
+        length += len(part)
+
+    return "".join(parts)[:size]
+
+
+def secrets(rng: random.Random, size: int, /) -> str:
+    # Dense real tokens for every service, including tokens directly adjacent to each other.
+    generators: tuple[Callable[[random.Random], str], ...] = (_discord_token, _github_token, _pypi_token)
+
+    parts: list[str] = []
+    length: int = 0
+
+    while length < size:
+        part: str = rng.choice(generators)(rng) + rng.choice(("", " ", "\n", ".", "-"))
+        parts.append(part)
+        length += len(part)
+
+    return "".join(parts)[:size]
+
+
+CORPORA: dict[str, Callable[[random.Random, int], str]] = {
+    "code": code,
+    "minified": minified,
+    "markup": markup,
+    "blobs": blobs,
+    "near_misses": near_misses,
+    "secrets": secrets,
+}
+
+
+def generate(name: str, size: int, /, *, seed: int = 0) -> str:
+    return CORPORA[name](random.Random(f"{name}-{seed}"), size)
@@ -0,0 +1,163 @@
+"""MystBin. Share code easily.
+
+Copyright (C) 2020-Current PythonistaGuild
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Throughput and differential checks for ``src/core/escaping.py``.
+
+Run from the repository root::
+
+    python -m benchmarks.escaping            # benchmark every corpus against bleach
+    python -m benchmarks.escaping --check    # compare the output against bleach
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+from typing import TYPE_CHECKING
+
+import bleach
+
+# importing src.core loads the application config...
+os.environ.setdefault("CONFIG_PATH", "config.template.toml")
+
+from src.core.escaping import escape_content
+
+from .corpora import CORPORA, generate
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+
+CHECK_SIZE = 64 * 1024
+FUZZ_CASES = 20_000
+
+# Hand written cases covering the tokenizer paths bleach takes...
+CASES: list[str] = [
+    "",
+    "plain text",
+    "<!-- comment --> <!DOCTYPE html> &#xa; &amp;#xa;",
+    "a < b && c > d",
+    "if a<b && c>d: pass",
+    '<div class="a" id=b>text</div>',
+    '<a href=">">',
+    "Vec<u8>; #include <stdio.h>",
+    "</>, </ 1>, </, <>, <",
+    "<?xml version='1.0'?><root/>",
+    '<? "quoted" & <unescaped> ?>',
+    "<a <b <c>",
+    "<a <b x>y z",
+    "<a b b>",
+    "<a b",
+    "<a b=",
+    '<a b="c',
+    "<a b=c",
+    '<a b="c"',
+    "<a b/",
+    "&amp; &lt; &copy; &#65; &#x41; &#1a; &nbsp &unknown; &AElig",
+    "\x00 <a\x00> \x00",
+    "\x0c leading and trailing form feeds \x0c\x01\x0b",
+    "windows\r\nand old mac\rnewlines",
+    '<?php echo $a; ?> a=&#; b= &hellip; c=&amp;lt; d="&#0;',
+    "<?>=&#;",
+    "<?>&#;=<?<!",
+    "<?>=&#x110000; = &#x41; =&#;=&#;",
+    "<a <?>",
+    "</a <?>",
+]
+
+
+def reference(content: str, /) -> str:
+    return bleach.clean(
+        content.replace("<!", "&lt;&#33;").replace("&#xa;", "&amp;#xa;"),
+        attributes=[],
+        tags=[],
+        strip_comments=False,
+    )
+
+
+def fuzz_case(rng: random.Random, /) -> str:
+    atoms: tuple[str, ...] = (
+        "<", ">", "</", "/", "<?", "<!", "&", "&#", "&#x", ";", "#", "x", "a", "B", "1", "amp", "lt", "AElig",
+        "hellip", "#x41", "#65", "!", " ", "\t", "\n", "\r", "\x0c", "\x00", "\x01", "\x0b", '"', "'", "=", "=",
+        "`", "é",
+    )  # fmt: skip
+    return "".join(rng.choices(atoms, k=rng.randint(0, 40)))
+
+
+def check() -> int:
+    failures: int = 0
+    rng: random.Random = random.Random(0)
+
+    cases: list[tuple[str, str]] = [(f"case {index}", case) for index, case in enumerate(CASES)]
+    cases += [(f"corpus {name!r}", generate(name, CHECK_SIZE)) for name in CORPORA]
+    cases += [(f"fuzz {index}", fuzz_case(rng)) for index in range(FUZZ_CASES)]
+
+    for label, content in cases:
+        if (escaped := escape_content(content)) != (expected := reference(content)):
+            failures += 1
+            print(f"{label}: {content[:200]!r}\n  expected {expected[:200]!r}\n  got      {escaped[:200]!r}")
+
+    print(f"{len(cases) - failures} passed, {failures} failed.")
+    return 1 if failures else 0
+
+
+def measure(function: Callable[[str], object], content: str, /, *, repeat: int) -> float:
+    best: float = float("inf")
+
+    for _ in range(repeat):
+        start: float = time.perf_counter()
+        function(content)
+        best = min(best, time.perf_counter() - start)
+
+    return len(content.encode()) / best / 1_000_000
+
+
+def benchmark(*, size: int, repeat: int) -> int:
+    columns: list[tuple[str, Callable[[str], object]]] = [("escape_content", escape_content), ("bleach", reference)]
+
+    print(f"MB/s, best of {repeat}, {size / 1_000_000:.1f} MB per corpus")
+    print(f"{'corpus':<14}" + "".join(f"{name:>16}" for name, _ in columns) + f"{'speedup':>10}")
+
+    for name in CORPORA:
+        content: str = generate(name, size)
+        rates: list[float] = [measure(function, content, repeat=repeat) for _, function in columns]
+        print(f"{name:<14}" + "".join(f"{rate:>16.1f}" for rate in rates) + f"{rates[0] / rates[1]:>9.1f}x")
+
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.escaping",
+        description="Throughput and differential checks for the paste content escaping.",
+    )
+    parser.add_argument("--size", type=float, default=1, help="size of each corpus in MB (default: 1)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement, the best is reported (default: 3)")
+    parser.add_argument("--check", action="store_true", help="compare the output against bleach")
+    args = parser.parse_args()
+
+    if args.check:
+        return check()
+
+    return benchmark(size=int(args.size * 1_000_000), repeat=args.repeat)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
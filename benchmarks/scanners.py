@@ -0,0 +1,172 @@
+"""MystBin. Share code easily.
+
+Copyright (C) 2020-Current PythonistaGuild
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Throughput and golden output checks for ``src/core/scanners.py``.
+
+Run from the repository root::
+
+    python -m benchmarks.scanners            # benchmark every corpus
+    python -m benchmarks.scanners --check    # compare results against the golden outputs
+    python -m benchmarks.scanners --update   # regenerate the golden outputs after an intended change
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import pathlib
+import sys
+import time
+from typing import TYPE_CHECKING, Any
+
+# importing src.core loads the application config...
+os.environ.setdefault("CONFIG_PATH", "config.template.toml")
+
+from src.core.scanners import BaseScanner, DiscordScanner, GitHubScanner, PyPiScanner, SecurityInfo
+
+from .corpora import CORPORA, generate
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from types_.scanner import ScannerSecret
+
+
+GOLDEN_FILE = pathlib.Path(__file__).parent / "golden" / "scanners.json"
+GOLDEN_SIZE = 256 * 1024
+
+SCANNERS: tuple[type[BaseScanner], ...] = (DiscordScanner, PyPiScanner, GitHubScanner)
+
+DISCORD = "MTIzNDU2Nzg5MDEyMzQ1Njc4.abcdef." + "x" * 27
+GITHUB = "ghp_" + "A" * 36
+PYPI = "pypi-AgEIcHlwaS5vcmc" + "a" * 70
+
+# Hand written cases: (content, expected results of SecurityInfo.scan_file)
+CASES: list[tuple[str, list[Any]]] = [
+    ("", []),
+    (DISCORD, [["Discord", [[0, DISCORD]]]]),
+    ("_" * 24 + ".abcdef." + "x" * 27, []),  # user id is not valid base64
+    (DISCORD[:-1], []),  # tail one character short
+    (f"token = '{DISCORD}'", [["Discord", [[9, DISCORD]]]]),
+    (GITHUB, [["GitHub", [[0, GITHUB]]]]),
+    (GITHUB[:-1], []),
+    (GITHUB + "A", [["GitHub", [[0, GITHUB]]]]),
+    (PYPI, [["PyPi", [[0, PYPI]]]]),
+    (PYPI[:-1], []),
+    # Tokens of different services overlapping each other are all reported...
+    (DISCORD + GITHUB, [["Discord", [[0, DISCORD + GITHUB]]], ["GitHub", [[len(DISCORD), GITHUB]]]]),
+    (
+        f"{GITHUB}\n{DISCORD}\n{PYPI}",
+        [
+            ["Discord", [[len(GITHUB) + 1, DISCORD]]],
+            ["PyPi", [[len(GITHUB) + len(DISCORD) + 2, PYPI]]],
+            ["GitHub", [[0, GITHUB]]],
+        ],
+    ),
+]
+
+
+def results(content: str, /) -> list[Any]:
+    secrets: list[ScannerSecret] = SecurityInfo.scan_file(content)
+    return [[s["service"].value, [list(t) for t in s["tokens"]]] for s in secrets]
+
+
+def summarise(content: str, /) -> dict[str, Any]:
+    found: list[Any] = results(content)
+
+    return {
+        "matches": {service: len(tokens) for service, tokens in found},
+        "sha256": hashlib.sha256(json.dumps(found).encode()).hexdigest(),
+    }
+
+
+def check() -> int:
+    failures: int = 0
+
+    for index, (content, expected) in enumerate(CASES):
+        if (found := results(content)) != expected:
+            failures += 1
+            print(f"case {index}: expected {expected!r}, got {found!r}")
+
+    golden: dict[str, Any] = json.loads(GOLDEN_FILE.read_text(encoding="utf-8"))
+    for name in CORPORA:
+        if (summary := summarise(generate(name, GOLDEN_SIZE))) != golden[name]:
+            failures += 1
+            print(f"corpus {name!r}: expected {golden[name]!r}, got {summary!r}")
+
+    print(f"{len(CASES) + len(CORPORA) - failures} passed, {failures} failed.")
+    return 1 if failures else 0
+
+
+def update() -> int:
+    golden: dict[str, Any] = {name: summarise(generate(name, GOLDEN_SIZE)) for name in CORPORA}
+    GOLDEN_FILE.write_text(json.dumps(golden, indent=4) + "\n", encoding="utf-8")
+
+    print(f"Golden outputs written to {GOLDEN_FILE}.")
+    return 0
+
+
+def measure(function: Callable[[str], object], content: str, /, *, repeat: int) -> float:
+    best: float = float("inf")
+
+    for _ in range(repeat):
+        start: float = time.perf_counter()
+        function(content)
+        best = min(best, time.perf_counter() - start)
+
+    return len(content.encode()) / best / 1_000_000
+
+
+def benchmark(*, size: int, repeat: int) -> int:
+    columns: list[tuple[str, Callable[[str], object]]] = [(s.__name__, s.match) for s in SCANNERS]
+    columns.append(("scan_file", SecurityInfo.scan_file))
+
+    print(f"MB/s, best of {repeat}, {size / 1_000_000:.1f} MB per corpus")
+    print(f"{'corpus':<14}" + "".join(f"{name:>16}" for name, _ in columns))
+
+    for name in CORPORA:
+        content: str = generate(name, size)
+        rates: list[float] = [measure(function, content, repeat=repeat) for _, function in columns]
+        print(f"{name:<14}" + "".join(f"{rate:>16.1f}" for rate in rates))
+
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.scanners",
+        description="Throughput and golden output checks for the secret scanners.",
+    )
+    parser.add_argument("--size", type=float, default=4, help="size of each corpus in MB (default: 4)")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per measurement, the best is reported (default: 5)")
+    parser.add_argument("--check", action="store_true", help="compare results against the golden outputs")
+    parser.add_argument("--update", action="store_true", help="regenerate the golden outputs")
+    args = parser.parse_args()
+
+    if args.update:
+        return update()
+
+    if args.check:
+        return check()
+
+    return benchmark(size=int(args.size * 1_000_000), repeat=args.repeat)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
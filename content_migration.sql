@@ -0,0 +1,31 @@
+-- Moves the content of files into file_contents, stored once per content hash, and adds the columns used for
+-- conditional requests. Databases created before these existed need it, see the README.
+-- Stop the servers and run this once with psql, then start them again.
+BEGIN; -- start transaction
+
+SAVEPOINT contents;
+CREATE TABLE IF NOT EXISTS file_contents (
+    hash TEXT PRIMARY KEY, -- sha256 of the normalised content, computed when a paste is created
+    content TEXT,
+    compressed BYTEA STORAGE EXTERNAL, -- the content as a zstd frame when stored compressed, `content` is NULL then
+    charcount INTEGER NOT NULL,
+    refs INTEGER NOT NULL DEFAULT 0 -- the files using this content, it is deleted with the last of them
+);
+
+ALTER TABLE files ADD COLUMN content_hash TEXT;
+UPDATE files SET content_hash = encode(sha256(convert_to(content, 'UTF8')), 'hex');
+
+INSERT INTO file_contents (hash, content, charcount, refs)
+SELECT DISTINCT ON (content_hash) content_hash, content, charcount, count(*) OVER (PARTITION BY content_hash)
+FROM files;
+
+SAVEPOINT files;
+ALTER TABLE files DROP COLUMN charcount, DROP COLUMN content; -- charcount is generated from content
+ALTER TABLE files ALTER COLUMN content_hash SET NOT NULL;
+ALTER TABLE files ADD FOREIGN KEY (content_hash) REFERENCES file_contents(hash);
+
+SAVEPOINT validators;
+ALTER TABLE pastes ADD COLUMN IF NOT EXISTS etag TEXT; -- pastes created before this have none
+ALTER TABLE files ADD COLUMN IF NOT EXISTS created_at TIMESTAMP; -- files created before this have none
+
+COMMIT;
@@ -17,7 +17,16 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
 import asyncio
+import contextlib
 import logging
+import multiprocessing
+import multiprocessing.connection
+import multiprocessing.process
+import signal
+import socket
+import sys
+import time
+from types import FrameType
 
 import aiohttp
 import starlette_plus
@@ -31,31 +40,139 @@ LOGGER = logging.getLogger(__name__)
 __all__ = ()
 
 
-async def main() -> None:
+HOST: str = core.CONFIG["SERVER"]["host"]
+PORT: int = core.CONFIG["SERVER"]["port"]
+WORKERS: int = core.CONFIG["SERVER"].get("workers", 1)
+
+# A worker which exits sooner than this after it was started most likely can not start at all...
+MINIMUM_UPTIME: float = 10
+SHUTDOWN_TIMEOUT: float = 30
+
+
+async def main(sockets: list[socket.socket] | None = None) -> None:
     async with (
         aiohttp.ClientSession() as session,
         core.Database(
-            dsn=core.CONFIG["DATABASE"]["dsn"], session=session, github_config=core.CONFIG.get("GITHUB")
+            dsn=core.CONFIG["DATABASE"]["dsn"],
+            session=session,
+            github_config=core.CONFIG.get("GITHUB"),
+            cache_config=core.CONFIG.get("CACHE"),
         ) as database,
     ):
         app: core.Application = core.Application(database=database)
 
-        host: str = core.CONFIG["SERVER"]["host"]
-        port: int = core.CONFIG["SERVER"]["port"]
-
         config: uvicorn.Config = uvicorn.Config(
             app=app,
-            host=host,
-            port=port,
+            host=HOST,
+            port=PORT,
             access_log=False,
             forwarded_allow_ips="*",
         )
         server: uvicorn.Server = uvicorn.Server(config)
 
-        await server.serve()
+        await server.serve(sockets=sockets)
+
+
+def bind() -> socket.socket:
+    # Every worker binds a socket of its own to the address, and the kernel spreads new connections over them...
+    info = socket.getaddrinfo(HOST, PORT, type=socket.SOCK_STREAM, flags=socket.AI_PASSIVE)[0]
+
+    sock: socket.socket = socket.socket(info[0], info[1], info[2])
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind(info[4])
+
+    return sock
+
+
+def terminate(_: int, __: FrameType | None) -> None:
+    # uvicorn raises the signal again once it has shut down, this exits through the cleanup of `main` from there...
+    sys.exit(0)
+
+
+def work() -> None:
+    # Each worker is a process of its own, with its own database pools, client session and event loop...
+    signal.signal(signal.SIGTERM, terminate)
+
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(main(sockets=[bind()]))
+
+
+class Supervisor:
+    """Runs the workers and replaces those which stop, until it is interrupted or terminated."""
+
+    def __init__(self, workers: int, /) -> None:
+        self._workers: int = workers
+        self._context = multiprocessing.get_context("spawn")
+        self._processes: dict[int, tuple[multiprocessing.process.BaseProcess, float]] = {}
+
+    def _start(self) -> None:
+        process = self._context.Process(target=work, name="mystbin-worker")
+        process.start()
+        self._processes[process.sentinel] = (process, time.monotonic())
+
+    def watch(self) -> int:
+        for _ in range(self._workers):
+            self._start()
+
+        LOGGER.info("Started %s workers on %s:%s.", self._workers, HOST, PORT)
+
+        while True:
+            for sentinel in multiprocessing.connection.wait(list(self._processes)):
+                process, started = self._processes.pop(sentinel)  # pyright: ignore[reportArgumentType] # sentinels are ints
+                process.join()
+
+                if time.monotonic() - started < MINIMUM_UPTIME:
+                    LOGGER.error("Worker %s stopped with %s right after starting, stopping.", process.pid, process.exitcode)
+                    return 1
+
+                LOGGER.warning("Worker %s stopped with %s, starting another.", process.pid, process.exitcode)
+                self._start()
+
+    def stop(self, *, interrupted: bool) -> None:
+        # Interrupted workers are shutting down already, the others are asked to. Waiting for them is bounded, so
+        # further signals are ignored until they stopped or were killed...
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+        for process, _ in self._processes.values():
+            if not interrupted:
+                process.terminate()
+
+        for process, _ in self._processes.values():
+            process.join(SHUTDOWN_TIMEOUT)
+            if process.is_alive():
+                process.kill()
+
+
+def supervise(workers: int, /) -> int:
+    if not hasattr(socket, "SO_REUSEPORT"):
+        LOGGER.error("Running more than one worker requires SO_REUSEPORT, which this platform does not support.")
+        return 1
+
+    # Without Redis, sessions and rate limits are kept in memory, so each worker would have its own...
+    if not core.CONFIG.get("REDIS"):
+        LOGGER.error("Running more than one worker requires [REDIS], sessions and rate limits are kept per process.")
+        return 1
+
+    supervisor: Supervisor = Supervisor(workers)
+    interrupted: bool = False
+    signal.signal(signal.SIGTERM, terminate)
+
+    try:
+        return supervisor.watch()
+    except KeyboardInterrupt:
+        interrupted = True
+        return 0
+    finally:
+        supervisor.stop(interrupted=interrupted)
+
 
+if __name__ == "__main__":
+    if WORKERS > 1:
+        sys.exit(supervise(WORKERS))
 
-try:
-    asyncio.run(main())
-except KeyboardInterrupt:
-    LOGGER.info("Closing the MystBin application due to KeyboardInterrupt.")
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        LOGGER.info("Closing the MystBin application due to KeyboardInterrupt.")
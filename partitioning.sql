@@ -0,0 +1,80 @@
+-- Converts pastes and files into tables partitioned by the month pastes were created in, see the README.
+-- Stop the servers and run this once with psql. Starting the servers again recreates the paste_files view and the
+-- trigger on files, which are dropped with the old tables.
+BEGIN; -- start transaction
+
+SAVEPOINT rename;
+DROP VIEW IF EXISTS paste_files;
+ALTER TABLE pastes RENAME TO pastes_unpartitioned;
+ALTER TABLE files RENAME TO files_unpartitioned;
+-- index names are shared by the schema, the new tables take over the old ones
+ALTER INDEX IF EXISTS pastes_pkey RENAME TO pastes_unpartitioned_pkey;
+ALTER INDEX IF EXISTS pastes_safety_key RENAME TO pastes_unpartitioned_safety_key;
+ALTER INDEX IF EXISTS pastes_safety_idx RENAME TO pastes_unpartitioned_safety_idx;
+ALTER INDEX IF EXISTS pastes_expires_idx RENAME TO pastes_unpartitioned_expires_idx;
+ALTER INDEX IF EXISTS files_pkey RENAME TO files_unpartitioned_pkey;
+ALTER INDEX IF EXISTS files_content_hash_idx RENAME TO files_unpartitioned_content_hash_idx;
+
+SAVEPOINT tables;
+CREATE TABLE pastes (
+    id TEXT NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT (NOW() AT TIME ZONE 'UTC'),
+    expires TIMESTAMP WITH TIME ZONE,
+    password TEXT DEFAULT NULL,
+    views INTEGER DEFAULT 0,
+    safety TEXT,
+    etag TEXT,
+    PRIMARY KEY (id, created_at) -- unique keys must contain the partition key, ids are checked when pastes are created
+) PARTITION BY RANGE (created_at);
+
+CREATE INDEX pastes_safety_idx ON pastes (safety);
+CREATE INDEX pastes_expires_idx ON pastes (expires); -- also finds pastes that never expire, before dropping a partition
+
+CREATE TABLE files (
+    parent_id TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    loc INTEGER NOT NULL,
+    file_index INTEGER NOT NULL,
+    annotation TEXT,
+    warning_positions INTEGER[],
+    content_hash TEXT NOT NULL REFERENCES file_contents(hash),
+    created_at TIMESTAMP NOT NULL, -- the creation time of the paste, so files share the partition of their paste
+    PRIMARY KEY (parent_id, file_index, created_at),
+    FOREIGN KEY (parent_id, created_at) REFERENCES pastes(id, created_at) ON DELETE CASCADE
+) PARTITION BY RANGE (created_at);
+
+CREATE INDEX files_content_hash_idx ON files (content_hash);
+
+-- file indexes keep counting from the sequence of the old table, which must outlive it
+DO $$
+DECLARE
+    sequence TEXT := pg_get_serial_sequence('files_unpartitioned', 'file_index');
+BEGIN
+    EXECUTE format('ALTER TABLE files ALTER COLUMN file_index SET DEFAULT nextval(%L)', sequence);
+    EXECUTE format('ALTER SEQUENCE %s OWNED BY files.file_index', sequence);
+END
+$$;
+
+SAVEPOINT partitions;
+SELECT create_paste_partitions(COALESCE(min(created_at), NOW() AT TIME ZONE 'UTC'), 2) FROM pastes_unpartitioned;
+-- only used when no partition was created in time, this should stay empty
+CREATE TABLE pastes_default PARTITION OF pastes DEFAULT;
+CREATE TABLE files_default PARTITION OF files DEFAULT;
+
+SAVEPOINT copy;
+DELETE FROM files_unpartitioned WHERE parent_id IS NULL; -- unreachable, this releases their content
+
+INSERT INTO pastes (id, created_at, expires, password, views, safety, etag)
+SELECT id, created_at, expires, password, views, safety, etag FROM pastes_unpartitioned;
+
+INSERT INTO files (parent_id, filename, loc, file_index, annotation, warning_positions, content_hash, created_at)
+SELECT f.parent_id, f.filename, f.loc, f.file_index, f.annotation, f.warning_positions, f.content_hash, p.created_at
+FROM files_unpartitioned f JOIN pastes_unpartitioned p ON p.id = f.parent_id;
+
+SAVEPOINT drops;
+DROP TABLE files_unpartitioned; -- does not fire the trigger, the copied files keep using their content
+DROP TABLE pastes_unpartitioned;
+
+COMMIT;
+
+ANALYZE pastes, files;
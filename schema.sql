@@ -6,20 +6,173 @@ CREATE TABLE IF NOT EXISTS pastes (
     expires TIMESTAMP WITH TIME ZONE,
     password TEXT DEFAULT NULL,
     views INTEGER DEFAULT 0,
-    safety TEXT UNIQUE
+    safety TEXT UNIQUE,
+    etag TEXT
 );
 
-CREATE UNIQUE INDEX IF NOT EXISTS pastes_safety_idx ON pastes (safety);
--- Index by safety keys for faster lookup to delete.
+-- Partitioned pastes can not have unique indexes without the partition key, partitioning.sql creates their own...
+DO $$
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'pastes'::regclass) = 'r' THEN
+        CREATE UNIQUE INDEX IF NOT EXISTS pastes_safety_idx ON pastes (safety);
+        -- Index by safety keys for faster lookup to delete.
+    END IF;
+END
+$$;
+
+CREATE INDEX IF NOT EXISTS pastes_expires_idx ON pastes (expires) WHERE expires IS NOT NULL;
+-- Index by expiry for the reaper, pastes which never expire are left out.
+
+CREATE TABLE IF NOT EXISTS file_contents (
+    hash TEXT PRIMARY KEY, -- sha256 of the normalised content, computed when a paste is created
+    content TEXT,
+    compressed BYTEA STORAGE EXTERNAL, -- the content as a zstd frame when stored compressed, `content` is NULL then
+    charcount INTEGER NOT NULL,
+    refs INTEGER NOT NULL DEFAULT 0 -- the files using this content, it is deleted with the last of them
+);
 
 CREATE TABLE IF NOT EXISTS files (
     parent_id TEXT REFERENCES pastes(id) ON DELETE CASCADE,
-    content TEXT NOT NULL,
     filename TEXT NOT NULL,
     loc INTEGER NOT NULL,
-    charcount INTEGER GENERATED ALWAYS AS (LENGTH(content)) STORED,
     file_index SERIAL NOT NULL,
     annotation TEXT,
     warning_positions INTEGER[],
+    content_hash TEXT NOT NULL REFERENCES file_contents(hash),
+    created_at TIMESTAMP, -- the creation time of the paste, the partition key of partitioned tables
     PRIMARY KEY (parent_id, file_index)
 );
+
+CREATE INDEX IF NOT EXISTS files_content_hash_idx ON files (content_hash);
+
+CREATE TABLE IF NOT EXISTS content_dictionaries (
+    id BIGINT PRIMARY KEY, -- the zstd dictionary id, recorded in every frame compressed with it
+    data BYTEA NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+-- Tokens found in public pastes, until they are posted to a gist. Kept when their paste is deleted...
+CREATE TABLE IF NOT EXISTS token_queue (
+    id BIGSERIAL PRIMARY KEY,
+    paste_id TEXT NOT NULL,
+    tokens TEXT[] NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    claimed_at TIMESTAMP WITH TIME ZONE -- set while a gist of the tokens is being posted
+);
+
+-- Files with their content, in the column order of the original files table that the models are built from...
+CREATE OR REPLACE VIEW paste_files AS
+SELECT
+    f.parent_id, c.content, f.filename, f.loc, c.charcount, f.file_index, f.annotation, f.warning_positions,
+    f.content_hash, c.compressed
+FROM files f JOIN file_contents c ON c.hash = f.content_hash;
+
+-- Deleting files, directly or when their paste is deleted or expires, releases their content...
+CREATE OR REPLACE FUNCTION release_file_contents() RETURNS TRIGGER LANGUAGE plpgsql AS $$
+BEGIN
+    -- Rows are locked in hash order, as pastes being created take them, so the two can not deadlock...
+    PERFORM 1 FROM file_contents WHERE hash IN (SELECT content_hash FROM released) ORDER BY hash FOR UPDATE;
+
+    UPDATE file_contents c SET refs = c.refs - r.count
+    FROM (SELECT content_hash, count(*) AS count FROM released GROUP BY content_hash) r
+    WHERE c.hash = r.content_hash;
+
+    DELETE FROM file_contents c WHERE c.hash IN (SELECT content_hash FROM released) AND c.refs <= 0;
+    RETURN NULL;
+END
+$$;
+
+CREATE OR REPLACE TRIGGER files_release_contents
+AFTER DELETE ON files REFERENCING OLD TABLE AS released
+FOR EACH STATEMENT EXECUTE FUNCTION release_file_contents();
+
+-- Maintenance of the partitioned layout, see partitioning.sql. Pastes and their files are partitioned by month...
+CREATE OR REPLACE FUNCTION create_paste_partitions(since TIMESTAMP, ahead INTEGER) RETURNS INTEGER LANGUAGE plpgsql AS $$
+DECLARE
+    period TIMESTAMP := date_trunc('month', since);
+    suffix TEXT;
+    created INTEGER := 0;
+BEGIN
+    WHILE period <= date_trunc('month', NOW() AT TIME ZONE 'UTC') + make_interval(months => ahead) LOOP
+        suffix := to_char(period, 'YYYY_MM');
+
+        IF to_regclass('pastes_' || suffix) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF pastes FOR VALUES FROM (%L) TO (%L)',
+                'pastes_' || suffix, period, period + interval '1 month'
+            );
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF files FOR VALUES FROM (%L) TO (%L)',
+                'files_' || suffix, period, period + interval '1 month'
+            );
+            created := created + 1;
+        END IF;
+
+        period := period + interval '1 month';
+    END LOOP;
+
+    RETURN created;
+END
+$$;
+
+-- Detaches the oldest partition whose pastes have all expired, or which is older than the retention, if there is one.
+-- The parents are locked in the order writers lock them, pastes before files, and only while detaching...
+CREATE OR REPLACE FUNCTION detach_paste_partition(retention INTERVAL) RETURNS TEXT LANGUAGE plpgsql AS $$
+DECLARE
+    suffix TEXT;
+    upper_bound TIMESTAMP;
+    live BOOLEAN;
+BEGIN
+    FOR suffix IN
+        SELECT substring(c.relname FROM 8) FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'pastes'::regclass AND c.relname ~ '^pastes_\d{4}_\d{2}$' ORDER BY c.relname
+    LOOP
+        upper_bound := to_timestamp(suffix, 'YYYY_MM')::TIMESTAMP + interval '1 month';
+        EXIT WHEN upper_bound > NOW() AT TIME ZONE 'UTC';
+
+        IF retention IS NULL OR upper_bound > NOW() AT TIME ZONE 'UTC' - retention THEN
+            EXECUTE format('SELECT EXISTS (SELECT 1 FROM %I WHERE expires IS NULL OR expires > NOW())', 'pastes_' || suffix)
+            INTO live;
+            CONTINUE WHEN live;
+        END IF;
+
+        LOCK TABLE pastes, files IN ACCESS EXCLUSIVE MODE;
+        EXECUTE format('ALTER TABLE files DETACH PARTITION %I', 'files_' || suffix);
+        EXECUTE format('ALTER TABLE pastes DETACH PARTITION %I', 'pastes_' || suffix);
+
+        RETURN 'pastes_' || suffix;
+    END LOOP;
+
+    RETURN NULL;
+END
+$$;
+
+-- Drops detached partitions, including those left by an interrupted run. Nothing else uses them any more...
+CREATE OR REPLACE FUNCTION drop_detached_partitions() RETURNS SETOF TEXT LANGUAGE plpgsql AS $$
+DECLARE
+    suffix TEXT;
+BEGIN
+    FOR suffix IN
+        SELECT substring(relname FROM 8) FROM pg_class
+        WHERE relname ~ '^pastes_\d{4}_\d{2}$' AND relkind = 'r' AND NOT relispartition ORDER BY relname
+    LOOP
+        -- Dropping does not fire the delete trigger, so the content the files used is released here...
+        IF to_regclass('files_' || suffix) IS NOT NULL THEN
+            EXECUTE format(
+                'CREATE TEMPORARY TABLE released ON COMMIT DROP AS '
+                'SELECT content_hash, count(*) AS count FROM %I GROUP BY content_hash',
+                'files_' || suffix
+            );
+            EXECUTE format('DROP TABLE %I', 'files_' || suffix);
+
+            PERFORM 1 FROM file_contents WHERE hash IN (SELECT content_hash FROM released) ORDER BY hash FOR UPDATE;
+            UPDATE file_contents c SET refs = c.refs - r.count FROM released r WHERE c.hash = r.content_hash;
+            DELETE FROM file_contents c WHERE c.hash IN (SELECT content_hash FROM released) AND c.refs <= 0;
+            DROP TABLE released;
+        END IF;
+
+        EXECUTE format('DROP TABLE %I', 'pastes_' || suffix);
+        RETURN NEXT 'pastes_' || suffix;
+    END LOOP;
+END
+$$;
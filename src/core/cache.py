@@ -0,0 +1,345 @@
+"""MystBin. Share code easily.
+
+Copyright (C) 2020-Current PythonistaGuild
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from __future__ import annotations
+
+import datetime
+import json
+import logging
+import sys
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, NamedTuple, cast
+
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+
+from .models import FileModel, PasteModel
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Iterable
+
+    from redis.asyncio.client import Pipeline
+
+    from types_.config import Cache
+
+
+LOGGER = logging.getLogger(__name__)
+
+__all__ = ("PasteCache",)
+
+
+class _Entry(NamedTuple):
+    data: Any
+    size: int
+    deadline: float
+
+
+class PasteCache:
+    """Read-through cache for immutable paste data and the responses built from it.
+
+    Entries are kept in an in-process LRU bounded by an approximate byte budget and, when a Redis URL is configured,
+    mirrored to Redis so other processes can be served without touching the database.
+
+    Pastes protected by a password are never stored. Paste data is kept in process for at most ``local_ttl`` seconds,
+    which bounds how long a paste deleted, or viewed, through another process is served as it was cached.
+    """
+
+    PREFIX: str = "mystbin:paste:"
+    HTML_PREFIX: str = "html:"
+    ENCODED_PREFIX: str = "encoded:"
+
+    def __init__(self, config: Cache, /) -> None:
+        self._max_bytes: int = config["max_bytes"]
+        self._ttl: float = config["ttl"]
+        self._local_ttl: float = config.get("local_ttl", 5)
+
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._size: int = 0
+
+        redis_url: str | None = config.get("redis")
+        self._redis: redis.Redis | None = redis.Redis.from_url(redis_url) if redis_url else None  # pyright: ignore[reportUnknownMemberType] # untyped **kwargs
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @staticmethod
+    def _sizeof(data: dict[str, Any]) -> int:
+        size: int = sys.getsizeof(data["paste"])
+
+        for file in data["files"]:
+            size += sys.getsizeof(file) + sys.getsizeof(file["content"]) + sys.getsizeof(file["filename"])
+
+        return size
+
+    @staticmethod
+    def _dumps(data: dict[str, Any]) -> str:
+        def default(value: object) -> str:
+            if isinstance(value, datetime.datetime):
+                return value.isoformat()
+
+            msg_ = f"Object of type {type(value).__name__} can not be cached."
+            raise TypeError(msg_)
+
+        return json.dumps(data, default=default)
+
+    @staticmethod
+    def _loads(raw: str | bytes) -> dict[str, Any]:
+        data: dict[str, Any] = json.loads(raw)
+        paste: dict[str, Any] = data["paste"]
+
+        for key in ("created_at", "expires"):
+            if paste[key] is not None:
+                paste[key] = datetime.datetime.fromisoformat(paste[key])
+
+        return data
+
+    @staticmethod
+    def _build(data: dict[str, Any]) -> PasteModel:
+        paste: PasteModel = PasteModel(data["paste"])
+        paste.files = [FileModel(f) for f in data["files"]]
+
+        return paste
+
+    def _deadline(self, expires: datetime.datetime | None, *, local: bool = False) -> float:
+        ttl: float = self._local_ttl if local else self._ttl
+
+        if expires:
+            remaining: float = (expires - datetime.datetime.now(tz=datetime.UTC)).total_seconds()
+            ttl = min(ttl, remaining)
+
+        return time.monotonic() + ttl
+
+    def _get_local(self, key: str) -> Any:  # noqa: ANN401 # entries hold either paste data or rendered HTML
+        entry: _Entry | None = self._entries.get(key)
+        if not entry:
+            return None
+
+        if entry.deadline <= time.monotonic():
+            self._discard_local(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return entry.data
+
+    def _store_local(self, key: str, data: object, *, size: int, deadline: float) -> None:
+        if size > self._max_bytes:
+            return
+
+        self._discard_local(key)
+        self._entries[key] = _Entry(data=data, size=size, deadline=deadline)
+        self._size += size
+
+        while self._size > self._max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= evicted.size
+
+    def _discard_local(self, key: str) -> None:
+        entry: _Entry | None = self._entries.pop(key, None)
+        if entry:
+            self._size -= entry.size
+
+    async def _get_remote(self, key: str) -> bytes | None:
+        if not self._redis:
+            return None
+
+        try:
+            # Responses are not decoded, which the types of redis can not tell...
+            return await cast("Awaitable[bytes | None]", self._redis.get(self.PREFIX + key))
+        except RedisError as error:
+            LOGGER.warning("Unable to read %r from the Redis cache: %s", key, error)
+            return None
+
+    async def _set_remote(self, key: str, value: str, *, deadline: float) -> None:
+        ttl: float = deadline - time.monotonic()
+        if not self._redis or ttl < 1:
+            return
+
+        try:
+            await self._redis.set(self.PREFIX + key, value, ex=int(ttl))
+        except RedisError as error:
+            LOGGER.warning("Unable to write %r to the Redis cache: %s", key, error)
+
+    async def _get_remote_field(self, key: str, field: str) -> bytes | None:
+        if not self._redis:
+            return None
+
+        try:
+            return await cast("Awaitable[bytes | None]", self._redis.hget(self.PREFIX + key, field))  # see _get_remote
+        except RedisError as error:
+            LOGGER.warning("Unable to read %r from the Redis cache: %s", key, error)
+            return None
+
+    async def _set_remote_field(self, key: str, field: str, value: bytes, *, deadline: float) -> None:
+        ttl: float = deadline - time.monotonic()
+        if not self._redis or ttl < 1:
+            return
+
+        try:
+            pipeline: Pipeline = self._redis.pipeline()
+            pipeline.hset(self.PREFIX + key, field, value)  # pyright: ignore[reportArgumentType, reportUnknownMemberType] # typed as str
+            pipeline.expire(self.PREFIX + key, int(ttl))
+            await pipeline.execute()
+        except RedisError as error:
+            LOGGER.warning("Unable to write %r to the Redis cache: %s", key, error)
+
+    async def get(self, identifier: str, /) -> PasteModel | None:
+        """Fetch a paste from the cache. Expired entries are treated as misses and evicted.
+
+        Returns
+        -------
+        :class:`PasteModel` | None
+            A new model built from the cached data, or ``None`` on a miss.
+        """
+        data: dict[str, Any] | None = self._get_local(identifier)
+        if data:
+            return self._build(data)
+
+        raw: bytes | None = await self._get_remote(identifier)
+        if not raw:
+            return None
+
+        data = self._loads(raw)
+        expires: datetime.datetime | None = data["paste"]["expires"]
+
+        if expires and expires <= datetime.datetime.now(tz=datetime.UTC):
+            return None
+
+        self._store_local(identifier, data, size=self._sizeof(data), deadline=self._deadline(expires, local=True))
+        return self._build(data)
+
+    async def set(self, paste: PasteModel, /) -> None:
+        """Store a paste and its files.
+
+        Password protected pastes and pastes without their files loaded are ignored.
+        """
+        if paste.has_password or paste.password or not paste.files:
+            return
+
+        data: dict[str, Any] = {"paste": dict(paste), "files": [dict(f) for f in paste.files]}
+        local: float = self._deadline(paste.expires, local=True)
+
+        self._store_local(paste.id, data, size=self._sizeof(data), deadline=local)
+        await self._set_remote(paste.id, self._dumps(data), deadline=self._deadline(paste.expires))
+
+    async def get_rendered(self, identifier: str, /) -> str | None:
+        """Fetch the rendered HTML of a pastes files.
+
+        Returns
+        -------
+        :class:`str` | None
+            The HTML, or ``None`` on a miss.
+        """
+        key: str = self.HTML_PREFIX + identifier
+
+        html: str | None = self._get_local(key)
+        if html is not None:
+            return html
+
+        raw: bytes | None = await self._get_remote(key)
+        if raw is None:
+            return None
+
+        # Redis does not keep the deadline, so locally the entry lives for at most one ttl...
+        html = raw.decode()
+        self._store_local(key, html, size=sys.getsizeof(html), deadline=self._deadline(None))
+        return html
+
+    async def set_rendered(self, paste: PasteModel, html: str, /) -> None:
+        """Store the rendered HTML of a pastes files, ignoring password protected pastes."""
+        if paste.has_password or paste.password:
+            return
+
+        key: str = self.HTML_PREFIX + paste.id
+        deadline: float = self._deadline(paste.expires)
+
+        self._store_local(key, html, size=sys.getsizeof(html), deadline=deadline)
+        await self._set_remote(key, html, deadline=deadline)
+
+    async def get_encoded(self, identifier: str, variant: str, encoding: str, /) -> bytes | None:
+        """Fetch a compressed response body stored for a paste.
+
+        Returns
+        -------
+        :class:`bytes` | None
+            The body, or ``None`` on a miss.
+        """
+        field: str = f"{variant}:{encoding}"
+        key: str = f"{self.ENCODED_PREFIX}{identifier}:{field}"
+
+        body: bytes | None = self._get_local(key)
+        if body is not None:
+            return body
+
+        # The variants of a paste are fields of one Redis hash, so they expire and are invalidated together...
+        body = await self._get_remote_field(self.ENCODED_PREFIX + identifier, field)
+        if body is None:
+            return None
+
+        self._store_local(key, body, size=sys.getsizeof(body), deadline=self._deadline(None))
+        return body
+
+    async def set_encoded(self, paste: PasteModel, variant: str, encoding: str, body: bytes, /) -> None:
+        """Store a compressed response body for a paste, ignoring password protected pastes."""
+        if paste.has_password or paste.password:
+            return
+
+        field: str = f"{variant}:{encoding}"
+        deadline: float = self._deadline(paste.expires)
+
+        self._store_local(f"{self.ENCODED_PREFIX}{paste.id}:{field}", body, size=sys.getsizeof(body), deadline=deadline)
+        await self._set_remote_field(self.ENCODED_PREFIX + paste.id, field, body, deadline=deadline)
+
+    async def invalidate(self, identifier: str, /) -> None:
+        keys: tuple[str, str, str] = (identifier, self.HTML_PREFIX + identifier, self.ENCODED_PREFIX + identifier)
+        encoded: str = f"{self.ENCODED_PREFIX}{identifier}:"
+
+        # Deletes are rare, so finding the local variants of the paste by scanning is fine...
+        for key in [*keys[:2], *(k for k in self._entries if k.startswith(encoded))]:
+            self._discard_local(key)
+
+        if not self._redis:
+            return
+
+        try:
+            await self._redis.delete(*(self.PREFIX + key for key in keys))
+        except RedisError as error:
+            LOGGER.warning("Unable to invalidate paste %r in the Redis cache: %s", identifier, error)
+
+    async def invalidate_pastes(self, identifiers: Iterable[str], /) -> None:
+        """Drop the cached data of pastes whose views changed, keeping the responses built from them."""
+        keys: list[str] = list(identifiers)
+
+        for key in keys:
+            self._discard_local(key)
+
+        if not self._redis or not keys:
+            return
+
+        try:
+            await self._redis.delete(*(self.PREFIX + key for key in keys))
+        except RedisError as error:
+            LOGGER.warning("Unable to invalidate %s pastes in the Redis cache: %s", len(keys), error)
+
+    async def close(self) -> None:
+        self._entries.clear()
+        self._size = 0
+
+        if self._redis:
+            await self._redis.aclose()
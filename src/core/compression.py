@@ -0,0 +1,278 @@
+"""MystBin. Share code easily.
+
+Copyright (C) 2020-Current PythonistaGuild
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import zlib
+from typing import TYPE_CHECKING, Protocol
+
+from starlette.datastructures import Headers, MutableHeaders
+
+# Both are part of the "compression" extra...
+HAS_BROTLI: bool = importlib.util.find_spec("brotli") is not None
+HAS_ZSTANDARD: bool = importlib.util.find_spec("zstandard") is not None
+
+if TYPE_CHECKING or HAS_BROTLI:
+    import brotli  # pyright: ignore[reportMissingTypeStubs] # brotli ships no type information
+
+if TYPE_CHECKING or HAS_ZSTANDARD:
+    import zstandard
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Sequence
+
+    from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+__all__ = ("ENCODINGS", "CompressionMiddleware", "compress", "negotiate", "supported")
+
+
+# Levels used while streaming a response, and for bodies that are compressed once and stored.
+# Stored bodies are compressed while a request waits, higher levels take seconds for the largest pastes...
+STREAM_LEVELS: dict[str, int] = {"zstd": 3, "br": 4, "gzip": 6}
+STORED_LEVELS: dict[str, int] = {"zstd": 10, "br": 6, "gzip": 9}
+
+# Encodings this process can produce, in order of preference...
+ENCODINGS: tuple[str, ...] = tuple(
+    name for name, available in (("zstd", HAS_ZSTANDARD), ("br", HAS_BROTLI), ("gzip", True)) if available
+)
+
+COMPRESSIBLE_TYPES: frozenset[str] = frozenset(
+    {
+        "application/javascript",
+        "application/json",
+        "application/xml",
+        "image/svg+xml",
+    }
+)
+
+
+class Compressor(Protocol):
+    def compress(self, data: bytes, /) -> bytes: ...
+
+    def finish(self) -> bytes: ...
+
+
+class _BrotliProcessor(Protocol):
+    def process(self, data: bytes, /) -> bytes: ...
+
+    def flush(self) -> bytes: ...
+
+    def finish(self) -> bytes: ...
+
+
+class _GzipCompressor:
+    def __init__(self, level: int) -> None:
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, data: bytes, /) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _BrotliCompressor:
+    def __init__(self, level: int) -> None:
+        self._compressor: _BrotliProcessor = brotli.Compressor(quality=level)  # pyright: ignore[reportUnknownMemberType] # see the import
+
+    def compress(self, data: bytes, /) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _ZstdCompressor:
+    def __init__(self, level: int) -> None:
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes, /) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+COMPRESSORS: dict[str, Callable[[int], Compressor]] = {
+    "zstd": _ZstdCompressor,
+    "br": _BrotliCompressor,
+    "gzip": _GzipCompressor,
+}
+
+
+def supported(encodings: Sequence[str] | None, /) -> tuple[str, ...]:
+    """Filter configured encodings down to those this process can produce.
+
+    Returns
+    -------
+    tuple[:class:`str`, ...]
+        The encodings in the configured order, or all available encodings when none were configured.
+    """
+    return tuple(e for e in encodings or ENCODINGS if e in ENCODINGS)
+
+
+def negotiate(accept_encoding: str, /, *, encodings: Sequence[str] = ENCODINGS) -> str | None:
+    """Pick the encoding for a response from an ``Accept-Encoding`` header.
+
+    Encodings the client marks with ``q=0`` are refused. Otherwise our own order of preference decides,
+    as clients rarely weigh their encodings in a useful way.
+
+    Returns
+    -------
+    :class:`str` | None
+        The encoding, or ``None`` when the response should not be compressed.
+    """
+    accepted: set[str] = set()
+    refused: set[str] = set()
+
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.partition(";")
+        name = name.strip()
+
+        quality: str = params.strip().removeprefix("q=").strip() if params else "1"
+        try:
+            (accepted if float(quality) > 0 else refused).add(name)
+        except ValueError:
+            continue
+
+    for encoding in encodings:
+        if encoding in accepted or ("*" in accepted and encoding not in refused):
+            return encoding
+
+    return None
+
+
+def compress(data: bytes, encoding: str, /) -> bytes:
+    """Compress a whole body at the level used for stored variants.
+
+    Returns
+    -------
+    :class:`bytes`
+    """
+    compressor: Compressor = COMPRESSORS[encoding](STORED_LEVELS[encoding])
+    return compressor.compress(data) + compressor.finish()
+
+
+def is_compressible(headers: Headers, /) -> bool:
+    if "content-encoding" in headers or "no-transform" in headers.get("cache-control", ""):
+        return False
+
+    content_type: str = headers.get("content-type", "").partition(";")[0].strip().lower()
+    return content_type.startswith("text/") or content_type in COMPRESSIBLE_TYPES
+
+
+class CompressionMiddleware:
+    """Compress responses with the best encoding both sides support.
+
+    Bodies are compressed as they are sent, so streamed responses stay streamed. Responses which already have a
+    ``Content-Encoding``, e.g. the precompressed raw pastes, are passed through untouched.
+    """
+
+    def __init__(self, app: ASGIApp, *, minimum_size: int = 500, encodings: Sequence[str] | None = None) -> None:
+        self.app: ASGIApp = app
+        self.minimum_size: int = minimum_size
+        self.encodings: tuple[str, ...] = supported(encodings)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        encoding: str | None = negotiate(Headers(scope=scope).get("accept-encoding", ""), encodings=self.encodings)
+        if not encoding:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(send, encoding=encoding, minimum_size=self.minimum_size)
+        await self.app(scope, receive, responder)
+
+
+class _CompressionResponder:
+    def __init__(self, send: Send, *, encoding: str, minimum_size: int) -> None:
+        self._send: Send = send
+        self._encoding: str = encoding
+        self._minimum_size: int = minimum_size
+
+        self._start: Message | None = None
+        self._compressor: Compressor | None = None
+        self._passthrough: bool = False
+
+    async def __call__(self, message: Message) -> None:
+        # The start of the response is held back until the first part of the body shows if it is worth compressing...
+        if message["type"] == "http.response.start":
+            self._start = message
+            return
+
+        if self._passthrough or message["type"] != "http.response.body":
+            await self._flush_start()
+            await self._send(message)
+            return
+
+        body: bytes = message.get("body", b"")
+        more_body: bool = message.get("more_body", False)
+
+        if not self._compressor:
+            if not self._should_compress(body, more_body=more_body):
+                self._passthrough = True
+                await self._flush_start()
+                await self._send(message)
+                return
+
+            self._compressor = COMPRESSORS[self._encoding](STREAM_LEVELS[self._encoding])
+
+        data: bytes = self._compressor.compress(body) if body else b""
+        if not more_body:
+            data += self._compressor.finish()
+
+        if self._start:
+            self._prepare_start(self._start, length=None if more_body else len(data))
+            await self._flush_start()
+        elif not data and more_body:
+            return
+
+        await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+    def _should_compress(self, body: bytes, *, more_body: bool) -> bool:
+        if not self._start:
+            return False
+
+        status: int = self._start["status"]
+        if status < 200 or status in {204, 304} or not is_compressible(Headers(scope=self._start)):
+            return False
+
+        return more_body or len(body) >= self._minimum_size
+
+    def _prepare_start(self, start: Message, *, length: int | None) -> None:
+        headers: MutableHeaders = MutableHeaders(scope=start)
+
+        headers["Content-Encoding"] = self._encoding
+        headers.add_vary_header("Accept-Encoding")
+        del headers["Content-Length"]
+        if length is not None:
+            headers["Content-Length"] = str(length)
+
+        # The encoded body is no longer byte for byte the representation the strong validator describes...
+        if (etag := headers.get("etag")) and not etag.startswith("W/"):
+            headers["ETag"] = "W/" + etag
+
+    async def _flush_start(self) -> None:
+        if self._start:
+            start, self._start = self._start, None
+            await self._send(start)
@@ -0,0 +1,106 @@
+"""MystBin. Share code easily.
+
+Copyright (C) 2020-Current PythonistaGuild
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING
+
+import asyncpg
+
+if TYPE_CHECKING:
+    _Pool = asyncpg.Pool[asyncpg.Record]
+    from .cache import PasteCache
+else:
+    _Pool = asyncpg.Pool
+
+
+LOGGER = logging.getLogger(__name__)
+
+__all__ = ("ViewCounter",)
+
+
+class ViewCounter:
+    """Aggregates paste views in memory and writes them back to the database in batches.
+
+    This keeps paste reads free of row writes; the accumulated deltas are applied with a single ``UPDATE`` every
+    ``interval`` seconds and once more on shutdown.
+
+    Cached pastes are served with the views they had when they were cached plus the views pending here, so once the
+    pending views are written the pastes are dropped from the cache and read with their new count.
+    """
+
+    QUERY: str = """
+        UPDATE pastes SET views = pastes.views + d.delta
+        FROM unnest($1::text[], $2::integer[]) AS d(id, delta)
+        WHERE pastes.id = d.id
+    """
+
+    def __init__(self, *, interval: float, cache: PasteCache | None = None) -> None:
+        self._interval: float = interval
+        self._cache: PasteCache | None = cache
+        self._pending: dict[str, int] = {}
+        self._lock: asyncio.Lock = asyncio.Lock()
+
+    def increment(self, identifier: str, /) -> int:
+        """Count a view for a paste.
+
+        Returns
+        -------
+        :class:`int`
+            The amount of views for this paste which have not yet been written to the database.
+        """
+        count: int = self._pending.get(identifier, 0) + 1
+        self._pending[identifier] = count
+
+        return count
+
+    async def flush(self, pool: _Pool, /) -> None:
+        async with self._lock:
+            if not self._pending:
+                return
+
+            current: dict[str, int] = self._pending
+            self._pending = {}
+
+            written: bool = False
+
+            try:
+                await pool.execute(self.QUERY, list(current), list(current.values()))
+                written = True
+            except (asyncpg.PostgresError, OSError) as error:
+                LOGGER.exception("Failed to flush view counts for %s pastes.", len(current), exc_info=error)
+            finally:
+                # Also when cancelled while writing, so shutting down does not lose them...
+                if not written:
+                    for identifier, count in current.items():
+                        self._pending[identifier] = self._pending.get(identifier, 0) + count
+
+            if not written:
+                return
+
+            LOGGER.debug("Flushed view counts for %s pastes.", len(current))
+
+        if self._cache:
+            await self._cache.invalidate_pastes(current)
+
+    async def run(self, pool: _Pool, /) -> None:
+        while True:
+            await asyncio.sleep(self._interval)
+            await self.flush(pool)
@@ -19,25 +19,37 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 from __future__ import annotations
 
 import asyncio
-import datetime
+import contextlib
+import functools
 import logging
 import pathlib
 from typing import TYPE_CHECKING, Any, Self
 
-import aiohttp
 import asyncpg
 
 from . import utils
+from .cache import PasteCache
 from .config import CONFIG
-from .errors import DatabaseError
-from .models import FileModel, PasteModel
-from .scanners import SecurityInfo, Services
+from .counter import ViewCounter
+from .gists import GistPoster
+from .leader import Leadership
+from .models import PasteModel
+from .pool import SCHEMA_LOCK, create_pool
+from .processing import PreparedFile, create_executor, prepare_files
+from .reaper import ExpiryReaper
+from .replicas import ReplicaRouter
+from .storage import ContentStorage, is_registered, register_dictionary
 
 if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Iterable
+    from concurrent.futures import Executor
+
+    import aiohttp
+
     _Pool = asyncpg.Pool[asyncpg.Record]
-    from types_.config import Github
-    from types_.github import PostGist
-    from types_.scanner import ScannerSecret
+    from types_.config import Cache, Github
+
+    from .models import FileModel
 else:
     _Pool = asyncpg.Pool
 
@@ -45,15 +57,127 @@ else:
 LOGGER = logging.getLogger(__name__)
 SCHEMA_FILE = pathlib.Path("schema.sql")
 ROOT_URL = CONFIG["SERVER"].get("root_url", "https://mystb.in")
+VIEWS_INTERVAL = CONFIG["DATABASE"].get("views_interval", 30)
+REAP_INTERVAL = CONFIG["DATABASE"].get("reap_interval", 60)
+REAP_BATCH = CONFIG["DATABASE"].get("reap_batch", 500)
+LEADER_INTERVAL = CONFIG["DATABASE"].get("leader_interval", 10)
+RETENTION = CONFIG["DATABASE"].get("retention")
+PGBOUNCER = CONFIG["DATABASE"].get("pgbouncer", False)
+REPLICAS = CONFIG["DATABASE"].get("replicas", [])
+REPLICA_INTERVAL = CONFIG["DATABASE"].get("replica_interval", 5)
+REPLICA_MAX_LAG = CONFIG["DATABASE"].get("replica_max_lag", 10)
+CHUNK_SIZE = CONFIG["PASTES"].get("chunk_size", 262_144)
+STORAGE = CONFIG["PASTES"].get("storage", "text")
+STORAGE_LEVEL = CONFIG["PASTES"].get("storage_level", 9)
 
 
 class Database:
     pool: _Pool
 
-    def __init__(self, *, dsn: str, session: aiohttp.ClientSession, github_config: Github | None) -> None:
+    # Queries run for most requests, which every connection prepares when it is opened, see `PREPARED_QUERIES`...
+    FETCH_PASTE_QUERY: str = """
+        SELECT p.*,
+        CASE WHEN p.password IS NOT NULL THEN true
+        ELSE false END AS has_password,
+        CASE WHEN p.password = CRYPT($2, p.password) THEN true
+        ELSE false END AS password_ok,
+        CASE WHEN p.password IS NULL OR p.password = CRYPT($2, p.password)
+        THEN ARRAY(
+            SELECT ROW(
+                f.parent_id, substring(c.content FOR COALESCE($3::integer, c.charcount)), f.filename, f.loc, c.charcount,
+                f.file_index, f.annotation, f.warning_positions, f.content_hash, c.compressed
+            )::paste_files
+            FROM files f JOIN file_contents c ON c.hash = f.content_hash
+            WHERE f.parent_id = p.id AND (f.created_at = p.created_at OR f.created_at IS NULL)
+            ORDER BY f.file_index OFFSET $4 LIMIT $5
+        ) END AS files
+        FROM pastes p
+        WHERE p.id = $1 AND (p.expires IS NULL OR p.expires > NOW())
+    """
+
+    READ_FILE_QUERY: str = """
+        SELECT substring(content FROM $3::integer FOR $4::integer) FROM paste_files
+        WHERE parent_id = $1 AND file_index = $2
+    """
+
+    CREATE_PASTE_QUERY: str = """
+        WITH paste AS (
+            INSERT INTO pastes (id, expires, password, safety, etag)
+            SELECT
+                $1::text, $2::timestamptz, (SELECT crypt($3, gen_salt('bf')) WHERE $3 is not null), $4::text, $10::text
+            WHERE NOT EXISTS (SELECT 1 FROM pastes WHERE id = $1)
+            RETURNING *
+        ), contents AS (
+            INSERT INTO file_contents AS c (hash, content, compressed, charcount, refs)
+            SELECT DISTINCT ON (u.hash) u.hash, u.content, u.compressed, u.charcount, count(*) OVER (PARTITION BY u.hash)
+            FROM unnest($11::text[], $5::text[], $13::bytea[], $12::integer[]) AS u(hash, content, compressed, charcount)
+            WHERE EXISTS (SELECT 1 FROM paste)
+            ORDER BY u.hash
+            ON CONFLICT (hash) DO UPDATE SET refs = c.refs + EXCLUDED.refs
+        ), new_files AS (
+            INSERT INTO files (parent_id, filename, loc, annotation, warning_positions, content_hash, created_at)
+            SELECT paste.id, f.filename, f.loc, f.annotation, f.positions::integer[], f.content_hash, paste.created_at
+            FROM paste, unnest($6::text[], $7::integer[], $8::text[], $9::text[], $11::text[])
+            WITH ORDINALITY AS f(filename, loc, annotation, positions, content_hash, ordinal)
+            ORDER BY f.ordinal
+            RETURNING *
+        ), queued AS (
+            INSERT INTO token_queue (paste_id, tokens)
+            SELECT paste.id, $14::text[] FROM paste WHERE cardinality($14::text[]) > 0
+        )
+        SELECT paste.*, ARRAY(
+            SELECT ROW(
+                f.parent_id, u.content, f.filename, f.loc, u.charcount, f.file_index, f.annotation, f.warning_positions,
+                f.content_hash, u.compressed
+            )::paste_files
+            FROM (SELECT *, row_number() OVER (ORDER BY file_index) AS ordinal FROM new_files) f
+            JOIN unnest($5::text[], $12::integer[], $13::bytea[])
+            WITH ORDINALITY AS u(content, charcount, compressed, ordinal) USING (ordinal)
+            ORDER BY f.file_index
+        ) AS files FROM paste
+    """
+
+    FETCH_SECURITY_QUERY: str = """SELECT * FROM pastes WHERE safety = $1 AND (expires IS NULL OR expires > NOW())"""
+
+    DELETE_SECURITY_QUERY: str = """DELETE FROM pastes WHERE safety = $1 RETURNING id"""
+
+    PREPARED_QUERIES: tuple[str, ...] = (
+        FETCH_PASTE_QUERY,
+        READ_FILE_QUERY,
+        CREATE_PASTE_QUERY,
+        FETCH_SECURITY_QUERY,
+        DELETE_SECURITY_QUERY,
+    )
+
+    # Read replicas only ever run these...
+    REPLICA_QUERIES: tuple[str, ...] = (
+        FETCH_PASTE_QUERY,
+        READ_FILE_QUERY,
+        FETCH_SECURITY_QUERY,
+    )
+
+    def __init__(
+        self,
+        *,
+        dsn: str,
+        session: aiohttp.ClientSession,
+        github_config: Github | None,
+        cache_config: Cache | None = None,
+    ) -> None:
         self._dsn: str = dsn
         self.session: aiohttp.ClientSession = session
+        self.cache: PasteCache | None = PasteCache(cache_config) if cache_config else None
+        self._views: ViewCounter = ViewCounter(interval=VIEWS_INTERVAL, cache=self.cache)
+        self._views_task: asyncio.Task[None] | None = None
+        self.reaper: ExpiryReaper = ExpiryReaper(interval=REAP_INTERVAL, batch=REAP_BATCH, retention=RETENTION)
+        self.leadership: Leadership = Leadership(dsn, interval=LEADER_INTERVAL)
+        self._leader_task: asyncio.Task[None] | None = None
+        self.replicas: ReplicaRouter = ReplicaRouter(REPLICAS, interval=REPLICA_INTERVAL, max_lag=REPLICA_MAX_LAG)
+        self._replicas_task: asyncio.Task[None] | None = None
+        self._executor: Executor | None = create_executor(CONFIG["PASTES"])
+        self._storage: ContentStorage | None = None
         self._handling_tokens = bool(self.session and github_config)
+        self.gists: GistPoster | None = None
 
         if self._handling_tokens:
             if not github_config:
@@ -61,106 +185,78 @@ class Database:
                 raise RuntimeError(msg_)
 
             LOGGER.info("Setup to handle Discord Tokens.")
-
-            self._gist_token = github_config["token"]
-            self._gist_timeout = github_config["timeout"]
-            # tokens bucket for gist posting: {paste_id: token\ntoken}
-            self.__tokens_bucket: dict[str, str] = {}
-            self.__token_lock = asyncio.Lock()
-            self.__token_task = asyncio.create_task(self._token_task())
+            self.gists = GistPoster(session, config=github_config, root_url=ROOT_URL)
 
     async def __aenter__(self) -> Self:
         await self.connect()
         return self
 
     async def __aexit__(self, *_: object) -> None:
-        task: asyncio.Task[None] | None = getattr(self, "__token_task", None)
-        if task:
-            task.cancel()
+        # The task may be writing views, it puts them back when cancelled and the last flush writes them...
+        if self._views_task:
+            self._views_task.cancel()
 
-        await self.close()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._views_task
 
-    async def _token_task(self) -> None:
-        # won't run unless pre-reqs are met in __init__
-        while True:
-            if self.__tokens_bucket:
-                async with self.__token_lock:
-                    await self._post_gist_of_tokens()
+        if self._leader_task:
+            self._leader_task.cancel()
 
-            await asyncio.sleep(self._gist_timeout)
-
-    def _handle_discord_tokens(self, tokens: list[str], paste_id: str) -> None:
-        if not self._handling_tokens or not tokens:
-            return
+        if self._replicas_task:
+            self._replicas_task.cancel()
 
-        LOGGER.info(
-            "Discord bot token located and added to token bucket. Current bucket size is: %s", len(self.__tokens_bucket)
-        )
-
-        self.__tokens_bucket[paste_id] = "\n".join(tokens)
-
-    async def _post_gist_of_tokens(self) -> None:
-        json_payload: PostGist = {
-            "description": (
-                "MystBin found these Discord tokens in a public paste, and posted them here to invalidate them. "
-                "If you intended to share these, please apply a password to the paste."
-            ),
-            "files": {},
-            "public": True,
-        }
-
-        github_headers = {
-            "Accept": "application/vnd.github+json",
-            "Authorization": f"Bearer {self._gist_token}",
-            "X-GitHub-Api-Version": "2022-11-28",
-        }
-
-        current_tokens = self.__tokens_bucket
-        self.__tokens_bucket = {}
+        await self._views.flush(self.pool)
+        await self.close()
 
-        for paste_id, tokens in current_tokens.items():
-            filename = str(datetime.datetime.now(datetime.UTC)) + "-tokens.txt"
-            json_payload["files"][filename] = {"content": f"{ROOT_URL}/{paste_id}:\n{tokens}"}
+    async def _lead(self) -> None:
+        # The duties of the elected process, see `Leadership`...
+        async with asyncio.TaskGroup() as group:
+            group.create_task(self.reaper.run(self.pool))
 
-        success = False
-
-        try:
-            async with self.session.post("https://api.github.com/gists", headers=github_headers, json=json_payload) as resp:
-                success = resp.ok
-
-                if not success:
-                    response_body = await resp.text()
-                    LOGGER.error(
-                        "Failed to create gist with token bucket with response status code %s and response body:\n\n%s",
-                        resp.status,
-                        response_body,
-                    )
-        except (aiohttp.ClientError, aiohttp.ClientOSError) as error:
-            success = False
-            LOGGER.exception("Failed to handle gist creation due to a client or operating system error", exc_info=error)
-
-        if success:
-            LOGGER.info("Gist created and invalidated tokens from %s pastes.", len(current_tokens))
-        else:
-            self.__tokens_bucket.update(current_tokens)
+            if self.gists:
+                group.create_task(self.gists.run(self.pool))
 
     async def connect(self) -> None:
+        # The schema is applied before the pool opens, as its connections prepare queries against it.
+        # Processes starting together take turns applying it, as replacing the same function at once fails.
+        # Connections of processes which already started do not prepare queries while it is applied, see `SCHEMA_LOCK`...
         try:
-            pool: asyncpg.Pool[asyncpg.Record] | None = await asyncpg.create_pool(dsn=self._dsn)
+            connection: asyncpg.Connection[asyncpg.Record] = await asyncpg.connect(
+                dsn=self._dsn, statement_cache_size=0 if PGBOUNCER else 100
+            )
         except Exception as e:
             raise RuntimeError from e
 
-        if not pool:
-            msg_ = "Failed to connect to the database... No additional information."
-            raise RuntimeError(msg_)
+        try:
+            with SCHEMA_FILE.open(encoding="utf-8") as fp:
+                await connection.execute(f"SELECT pg_advisory_xact_lock({SCHEMA_LOCK});\n{fp.read()}")
+        finally:
+            await connection.close()
 
-        with SCHEMA_FILE.open(encoding="utf-8") as fp:
-            await pool.execute(fp.read())
+        try:
+            pool: _Pool = await create_pool(self._dsn, config=CONFIG["DATABASE"], prepare=self.PREPARED_QUERIES)
+        except Exception as e:
+            raise RuntimeError from e
 
         self.pool = pool
+        await self.replicas.open(pool, config=CONFIG["DATABASE"], prepare=self.REPLICA_QUERIES)
+        await self._load_dictionaries()
+        self._views_task = asyncio.create_task(self._views.run(pool))
+        self._leader_task = asyncio.create_task(self.leadership.run(self._lead))
+
+        if self.replicas:
+            self._replicas_task = asyncio.create_task(self.replicas.run())
         LOGGER.info("Successfully connected to the database.")
 
     async def close(self) -> None:
+        if self.cache:
+            await self.cache.close()
+
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+        await self.replicas.close()
+
         try:
             await asyncio.wait_for(self.pool.close(), timeout=10)
         except TimeoutError:
@@ -168,136 +264,205 @@ class Database:
         else:
             LOGGER.info("Successfully closed the database connection.")
 
-    async def fetch_paste(self, identifier: str, *, password: str | None) -> PasteModel | None:
-        paste_query: str = """
-            UPDATE pastes SET views = views + 1 WHERE id = $1
-            RETURNING *,
-            CASE WHEN password IS NOT NULL THEN true
-            ELSE false END AS has_password,
-            CASE WHEN password = CRYPT($2, password) THEN true
-            ELSE false END AS password_ok
-        """
+    async def _load_dictionaries(self) -> None:
+        # Every dictionary is needed to read content compressed in the past, the newest one compresses new content...
+        query: str = """SELECT data FROM content_dictionaries ORDER BY created_at"""
+
+        async with self.pool.acquire() as connection:
+            dictionaries: list[bytes] = [r["data"] for r in await connection.fetch(query)]
+
+        if STORAGE != "zstd" and not dictionaries:
+            return
+
+        for data in dictionaries:
+            register_dictionary(data)
+
+        if STORAGE == "zstd":
+            self._storage = ContentStorage(level=STORAGE_LEVEL, dictionary=dictionaries[-1] if dictionaries else None)
+            LOGGER.info("Storing new file content compressed, with %s dictionaries available.", len(dictionaries))
 
-        file_query: str = """
-            SELECT * FROM files WHERE parent_id = $1
-        """
+    async def _ensure_dictionaries(self, files: Iterable[FileModel], /) -> None:
+        # Another process may have started compressing with a dictionary this one has not loaded yet...
+        missing: set[int] = {f.dictionary for f in files if not is_registered(f.dictionary)}
+        if not missing:
+            return
+
+        query: str = """SELECT data FROM content_dictionaries WHERE id = ANY($1::bigint[])"""
 
         async with self.pool.acquire() as connection:
-            record: asyncpg.Record | None = await connection.fetchrow(paste_query, identifier, password)
+            for record in await connection.fetch(query, list(missing)):
+                register_dictionary(record["data"])
+
+    def _count_view(self, paste: PasteModel) -> None:
+        paste.views += self._views.increment(paste.id)
+
+    async def _fetch_paste(
+        self,
+        identifier: str,
+        *,
+        password: str | None,
+        limit: int | None,
+        offset: int = 0,
+        count: int | None = None,
+    ) -> PasteModel | None:
+        # The paste row and its files are returned in the same round trip. Expired pastes are left to the reaper.
+        # With a limit, only that many characters of each file are returned and the rest is read with `read_file`.
+        # Offset and count select which of the files, in order, are returned.
+        # Matching the creation time limits partitioned files to the partition of the paste.
+        # Views are counted in memory and written to the primary later, so this is a read and may use a replica...
+        record: asyncpg.Record | None = await self.replicas.fetchrow(
+            self.FETCH_PASTE_QUERY, identifier, password, limit, offset, count
+        )
 
-            if not record:
-                return None
+        if not record:
+            return None
 
-            paste: PasteModel = PasteModel(record)
-            if paste.expires and paste.expires <= datetime.datetime.now(tz=datetime.UTC):
-                await connection.execute("DELETE FROM pastes WHERE id = $1", identifier)
-                return None
+        paste: PasteModel = PasteModel(record)
+        await self._ensure_dictionaries(paste.files)
 
-            if paste.has_password and not paste.password_ok:
-                return paste
+        return paste
 
-            records: list[asyncpg.Record] = await connection.fetch(file_query, identifier)
-            paste.files = [FileModel(d) for d in records]
+    async def _fetch_cached(self, identifier: str, /) -> PasteModel | None:
+        # Cached pastes have the views they had when they were cached, see `ViewCounter`...
+        if not self.cache:
+            return None
+
+        return await self.cache.get(identifier)
+
+    async def fetch_paste(self, identifier: str, *, password: str | None, limit: int | None = None) -> PasteModel | None:
+        if cached := await self._fetch_cached(identifier):
+            self._count_view(cached)
+            return cached
+
+        paste: PasteModel | None = await self._fetch_paste(identifier, password=password, limit=limit)
+        if not paste:
+            return None
 
+        # A limited fetch still holds the whole paste when every file fit within the limit...
+        if self.cache and all(len(f.content) == f.charcount for f in paste.files):
+            await self.cache.set(paste)
+
+        self._count_view(paste)
         return paste
 
-    async def create_paste(self, *, data: dict[str, Any]) -> PasteModel:  # noqa: PLR0914 # builder pattern and formulation
-        paste_query: str = """
-            INSERT INTO pastes (id, expires, password, safety)
-            VALUES ($1, $2, (SELECT crypt($3, gen_salt('bf')) WHERE $3 is not null), $4)
-            RETURNING *
-        """
+    async def fetch_paste_info(self, identifier: str, /) -> PasteModel | None:
+        # The paste row alone, for answering conditional requests. No files are loaded and no view is counted...
+        if cached := await self._fetch_cached(identifier):
+            return cached
+
+        return await self._fetch_paste(identifier, password=None, limit=0, count=0)
+
+    async def fetch_paste_file(
+        self,
+        identifier: str,
+        page: int,
+        *,
+        password: str | None,
+        limit: int | None = None,
+    ) -> PasteModel | None:
+        # Only the file at `page`, counting from 1 in file order, is loaded.
+        # `files` is empty when the paste has no such file...
+        paste: PasteModel | None
+
+        if paste := await self._fetch_cached(identifier):
+            paste.files = paste.files[page - 1 : page]
+        else:
+            paste = await self._fetch_paste(identifier, password=password, limit=limit, offset=page - 1, count=1)
 
-        file_query: str = """
-            INSERT INTO files (parent_id, content, filename, loc, annotation, warning_positions)
-            VALUES ($1, $2, $3, $4, $5, $6)
-            RETURNING *
-        """
+        if not paste:
+            return None
+
+        self._count_view(paste)
+        return paste
+
+    async def read_file(self, identifier: str, index: int, /, *, start: int = 0) -> AsyncIterator[str]:
+        # Content is read in chunks, and a connection is only held while a chunk is fetched...
+        while True:
+            chunk: str | None = await self.replicas.fetchval(self.READ_FILE_QUERY, identifier, index, start + 1, CHUNK_SIZE)
 
+            if not chunk:
+                return
+
+            yield chunk
+
+            if len(chunk) < CHUNK_SIZE:
+                return
+
+            start += len(chunk)
+
+    async def create_paste(self, *, data: dict[str, Any]) -> PasteModel:  # noqa: PLR0914 # builder pattern and formulation
+        # The paste and all of its files are written by one statement, so creation costs a single round trip.
+        # Content is stored once by its hash, content another paste already stored is only referenced again.
+        # Partitioned tables can not enforce unique ids, so a taken id inserts and returns nothing instead of raising...
         files: list[dict[str, Any]] = data["files"]
         expiry: str | None = data["expires"]
         password: str | None = data["password"]
 
+        # Scanning and normalising is CPU bound, so keep it off the event loop and away from a pool connection...
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        prepared: list[PreparedFile] = await loop.run_in_executor(
+            self._executor,
+            functools.partial(prepare_files, files, name_limit=CONFIG["PASTES"]["name_limit"], storage=self._storage),
+        )
+
+        # Compressed files are stored without their text...
+        contents: list[str | None] = [None if f.compressed else f.content for f in prepared]
+        names: list[str] = [f.filename for f in prepared]
+        locs: list[int] = [f.loc for f in prepared]
+        annotations: list[str] = [f.annotation for f in prepared]
+        # integer[] can not be nested with unnest, so the positions are sent as array literals...
+        positions: list[str] = ["{" + ",".join(map(str, f.positions)) + "}" for f in prepared]
+        # Tokens in public pastes are queued for a gist by the same statement, see `GistPoster`...
+        tokens: list[str] = [t for f in prepared for t in f.tokens] if self._handling_tokens and not password else []
+        hashes: list[str] = [f.content_hash for f in prepared]
+        charcounts: list[int] = [f.charcount for f in prepared]
+        compressed: list[bytes | None] = [f.compressed for f in prepared]
+
         async with self.pool.acquire() as connection:
             while True:
                 identifier: str = utils.generate_id()
                 safety: str = utils.generate_safety_token()
 
                 try:
-                    paster: asyncpg.Record | None = await connection.fetchrow(
-                        paste_query,
+                    record: asyncpg.Record | None = await connection.fetchrow(
+                        self.CREATE_PASTE_QUERY,
                         identifier,
                         expiry,
                         password,
                         safety,
+                        contents,
+                        names,
+                        locs,
+                        annotations,
+                        positions,
+                        utils.generate_etag(identifier, hashes),
+                        hashes,
+                        charcounts,
+                        compressed,
+                        tokens,
                     )
                 except asyncpg.exceptions.UniqueViolationError:
                     continue
-                else:
-                    break
-
-            if not paster:
-                msg_ = "Unable to insert paste data into database."
-                raise DatabaseError(msg_)
-
-            paste: PasteModel = PasteModel(paster)
-            async with connection.transaction():
-                for index, file in enumerate(files, 1):
-                    name: str = (file.get("filename") or f"file_{index}")[-CONFIG["PASTES"]["name_limit"] :]
-                    name = "_".join(name.splitlines())
-
-                    # Normalise newlines...
-                    content: str = file["content"].replace("\r\n", "\n").replace("\r", "\n")
-                    loc: int = file["content"].count("\n") + 1
-
-                    positions: list[int] = []
-                    extra: str = ""
-
-                    secrets: list[ScannerSecret] = SecurityInfo.scan_file(content)
-                    for payload in secrets:
-                        service: Services = payload["service"]
-
-                        extra += f"{service.value}, "
-                        positions += [t[0] for t in payload["tokens"]]
 
-                        if not password and self._handling_tokens and service is Services.discord:
-                            self._handle_discord_tokens(tokens=[t[1] for t in payload["tokens"]], paste_id=paste.id)
-
-                    extra = extra.removesuffix(", ")
-                    annotation = f"Contains possibly sensitive data from: {extra}" if extra else ""
-
-                    row: asyncpg.Record | None = await connection.fetchrow(
-                        file_query,
-                        paste.id,
-                        content,
-                        name,
-                        loc,
-                        annotation,
-                        sorted(positions),
-                    )
+                if record:
+                    break
 
-                    if row:
-                        paste.files.append(FileModel(row))
+        if tokens:
+            LOGGER.info("Discord bot token located and queued for a gist.")
 
-        return paste
+        return PasteModel(record)
 
     async def fetch_paste_security(self, *, token: str) -> PasteModel | None:
-        query: str = """SELECT * FROM pastes WHERE safety = $1"""
+        record: asyncpg.Record | None = await self.replicas.fetchrow(self.FETCH_SECURITY_QUERY, token)
 
-        async with self.pool.acquire() as connection:
-            record: asyncpg.Record | None = await connection.fetchrow(query, token)
-            if not record:
-                return None
-
-        paste: PasteModel = PasteModel(record=record)
-        if paste.expires and paste.expires <= datetime.datetime.now(tz=datetime.UTC):
-            await connection.execute("DELETE FROM pastes WHERE id = $1", token)
+        if not record:
             return None
 
-        return paste
+        return PasteModel(record=record)
 
     async def delete_paste_security(self, *, token: str) -> None:
-        query: str = """DELETE FROM pastes WHERE safety = $1"""
-
         async with self.pool.acquire() as connection:
-            await connection.execute(query, token)
+            identifier: str | None = await connection.fetchval(self.DELETE_SECURITY_QUERY, token)
+
+        if identifier and self.cache:
+            await self.cache.invalidate(identifier)
@@ -0,0 +1,445 @@
+"""MystBin. Share code easily.
+
+Copyright (C) 2020-Current PythonistaGuild
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Escaping of paste content for the HTML view.
+
+Paste content used to be escaped with ``bleach.clean(..., tags=[], attributes=[], strip_comments=False)``, which parses
+the whole file as HTML only to turn every tag back into text. :func:`escape_content` produces the same output without
+building a document: it follows the html5lib tokenizer only as far as it decides where tag-like text starts and ends,
+then applies bleach's entity handling and escapes the rest in a single pass.
+
+The output matches the bleach version in uv.lock, which ``python -m benchmarks.escaping --check`` compares against.
+"""
+
+from __future__ import annotations
+
+import html
+import html.entities
+import re
+import string
+
+__all__ = ("escape_content",)
+
+
+# html5lib's definitions, which differ slightly from the ones in the string module...
+SPACE: str = "\t\n\x0c\r "
+LETTERS: frozenset[str] = frozenset(string.ascii_letters)
+ASCII_LOWER: dict[int, int] = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+# Runs of characters which do not change the state of the tokenizer inside of a tag...
+SPACE_RUN_RE: re.Pattern[str] = re.compile(r"[\t\n\x0c\r ]*")
+NAME_RUN_RE: re.Pattern[str] = re.compile(r"[^\t\n\x0c\r />\x00]*")
+ATTRIBUTE_NAME_RUN_RE: re.Pattern[str] = re.compile(r"[^\t\n\x0c\r =>/\x00]*")
+INVALID_NAME_RE: re.Pattern[str] = re.compile(r"['\"<]")
+UNQUOTED_RUN_RE: re.Pattern[str] = re.compile(r"[^\t\n\x0c\r >\"'=<`\x00]*")
+
+# bleach replaces these with "?" outside of leading and trailing whitespace...
+INVISIBLE_RE: re.Pattern[str] = re.compile("[" + "".join(chr(c) for c in (*range(9), 11, 12, *range(14, 32))) + "]")
+
+ENTITY_END: frozenset[str] = frozenset("<&=;" + string.whitespace)
+ENTITY_PREFIXES: frozenset[str] = frozenset(
+    name[:length] for name in html.entities.html5 for length in range(1, len(name) + 1)
+)
+HEX_DIGITS: frozenset[str] = frozenset(string.hexdigits)
+DIGITS: frozenset[str] = frozenset(string.digits)
+
+# Parse errors which make bleach keep an unterminated tag at the end of the content instead of dropping it...
+KEPT_AT_EOF: frozenset[str] = frozenset(
+    {
+        "eof-in-tag-name",
+        "eof-in-attribute-name",
+        "eof-in-attribute-value-no-quotes",
+        "expected-end-of-tag-but-got-eof",
+        "duplicate-attribute",
+    }
+)
+
+
+def _scan_tag(text: str, position: int, /) -> tuple[int, bool, str | None]:  # noqa: C901, PLR0911, PLR0912, PLR0915 # tokenizer state machine
+    # Follows the tag states of html5lib's tokenizer from just after the first letter of the tag name.
+    # Returns where the tag ends, whether it was closed by ">" and the last parse error raised inside of it...
+    length: int = len(text)
+    state: str = "name"
+    error: str | None = None
+    names: set[str] = set()
+    name: str = ""
+
+    while position < length:
+        char: str = text[position]
+        position += 1
+
+        if state == "name":
+            if char in SPACE:
+                state = "before_attribute_name"
+            elif char == ">":
+                return position, True, error
+            elif char == "/":
+                state = "self_closing"
+            elif char == "\x00":
+                error = "invalid-codepoint"
+            else:
+                position = NAME_RUN_RE.match(text, position).end()  # type: ignore[union-attr] # always matches
+
+        elif state == "before_attribute_name":
+            if char in SPACE:
+                position = SPACE_RUN_RE.match(text, position).end()  # type: ignore[union-attr] # always matches
+                continue
+            if char == ">":
+                return position, True, error
+            if char == "/":
+                state = "self_closing"
+                continue
+
+            if char in "'\"=<":
+                error = "invalid-character-in-attribute-name"
+            elif char == "\x00":
+                error = "invalid-codepoint"
+
+            name = "\ufffd" if char == "\x00" else char
+            state = "attribute_name"
+
+        elif state == "attribute_name":
+            if char not in SPACE and char not in "=>/":
+                if char in "'\"<":
+                    error = "invalid-character-in-attribute-name"
+                elif char == "\x00":
+                    error = "invalid-codepoint"
+                    char = "\ufffd"
+
+                end: int = ATTRIBUTE_NAME_RUN_RE.match(text, position).end()  # type: ignore[union-attr] # always matches
+                run: str = text[position:end]
+                if INVALID_NAME_RE.search(run):
+                    error = "invalid-character-in-attribute-name"
+
+                name += char + run
+                position = end
+                continue
+
+            # Leaving the attribute name, which is compared to the previous names of this tag...
+            name = name.translate(ASCII_LOWER)
+            if name in names:
+                error = "duplicate-attribute"
+            names.add(name)
+
+            if char == ">":
+                return position, True, error
+
+            if char == "=":
+                state = "before_attribute_value"
+            elif char == "/":
+                state = "self_closing"
+            else:
+                state = "after_attribute_name"
+
+        elif state == "after_attribute_name":
+            if char in SPACE:
+                position = SPACE_RUN_RE.match(text, position).end()  # type: ignore[union-attr] # always matches
+                continue
+            if char == ">":
+                return position, True, error
+            if char == "=":
+                state = "before_attribute_value"
+                continue
+            if char == "/":
+                state = "self_closing"
+                continue
+
+            if char in "'\"<":
+                error = "invalid-character-after-attribute-name"
+            elif char == "\x00":
+                error = "invalid-codepoint"
+
+            name = "\ufffd" if char == "\x00" else char
+            state = "attribute_name"
+
+        elif state == "before_attribute_value":
+            if char in SPACE:
+                position = SPACE_RUN_RE.match(text, position).end()  # type: ignore[union-attr] # always matches
+                continue
+            if char == ">":
+                return position, True, "expected-attribute-value-but-got-right-bracket"
+
+            if char == '"':
+                state = "double_quoted"
+            elif char == "'":
+                state = "single_quoted"
+            else:
+                if char in "=<`":
+                    error = "equals-in-unquoted-attribute-value"
+                elif char == "\x00":
+                    error = "invalid-codepoint"
+                state = "unquoted"
+
+        elif state in {"double_quoted", "single_quoted"}:
+            end = text.find('"' if state == "double_quoted" else "'", position - 1)
+            if end == -1:
+                break
+
+            if "\x00" in text[position - 1 : end]:
+                error = "invalid-codepoint"
+
+            position = end + 1
+            state = "after_attribute_value"
+
+        elif state == "unquoted":
+            if char in SPACE:
+                state = "before_attribute_name"
+            elif char == ">":
+                return position, True, error
+            elif char in "\"'=<`":
+                error = "unexpected-character-in-unquoted-attribute-value"
+            elif char == "\x00":
+                error = "invalid-codepoint"
+            else:
+                position = UNQUOTED_RUN_RE.match(text, position).end()  # type: ignore[union-attr] # always matches
+
+        elif state == "after_attribute_value":
+            if char in SPACE:
+                state = "before_attribute_name"
+            elif char == ">":
+                return position, True, error
+            elif char == "/":
+                state = "self_closing"
+            else:
+                error = "unexpected-character-after-attribute-value"
+                position -= 1
+                state = "before_attribute_name"
+
+        elif char == ">":  # self closing
+            return position, True, error
+        else:
+            error = "unexpected-character-after-solidus-in-tag"
+            position -= 1
+            state = "before_attribute_name"
+
+    if state == "attribute_name":
+        # Reaching the end still leaves the attribute name...
+        return length, False, "duplicate-attribute" if name.translate(ASCII_LOWER) in names else "eof-in-attribute-name"
+
+    eof_errors: dict[str, str] = {
+        "name": "eof-in-tag-name",
+        "double_quoted": "eof-in-attribute-value-double-quote",
+        "single_quoted": "eof-in-attribute-value-single-quote",
+        "before_attribute_name": "expected-attribute-name-but-got-eof",
+        "after_attribute_name": "expected-end-of-tag-but-got-eof",
+        "before_attribute_value": "expected-attribute-value-but-got-eof",
+        "unquoted": "eof-in-attribute-value-no-quotes",
+        "after_attribute_value": "unexpected-EOF-after-attribute-value",
+        "self_closing": "unexpected-EOF-after-solidus-in-tag",
+    }
+    return length, False, eof_errors[state]
+
+
+def _tokenize(text: str, /) -> list[str]:  # noqa: C901 # tokenizer state machine
+    # Returns the nodes bleach would serialize, alternating between text and the data of comments.
+    # Tags are turned back into text and the constructs bleach drops are removed...
+    nodes: list[str] = []
+    parts: list[str] = []
+    length: int = len(text)
+    position: int = 0
+
+    while position < length:
+        index: int = text.find("<", position)
+        if index == -1:
+            index = length
+
+        data: str = text[position:index]
+        if data:
+            # The tree builder drops NUL characters outside of tags...
+            parts.append(data.replace("\x00", ""))
+
+        if index == length:
+            break
+
+        char: str = text[index + 1 : index + 2]
+        position = index + 1
+
+        if char == "?":
+            # "<?" starts a bogus comment, which is kept as an actual comment...
+            end: int = text.find(">", position)
+            nodes += ("".join(parts), text[position : length if end == -1 else end].replace("\x00", "\ufffd"))
+            parts = []
+            position = length if end == -1 else end + 1
+            continue
+
+        if char == "/":
+            char = text[index + 2 : index + 3]
+            position = index + 2
+
+            if char == ">":
+                position += 1
+                continue
+
+            if char not in LETTERS:
+                # "</" followed by anything other than a letter is a bogus comment, which bleach escapes as text.
+                # A trailing "</" ends up as text the same way...
+                end = text.find(">", position)
+                position = length if end == -1 else end + 1
+                parts.append(text[index:position])
+                continue
+
+        if char not in LETTERS:
+            parts.append("<")
+            continue
+
+        end, closed, error = _scan_tag(text, position + 1)
+        tag: str = text[index:end]
+
+        if not closed:
+            if error in KEPT_AT_EOF:
+                parts.append(tag)
+            break
+
+        parts.append(tag)
+        position = end
+
+    nodes.append("".join(parts))
+    return nodes
+
+
+def _match_entity(part: str, /) -> str | None:
+    # The entity at the start of text following a "&", as matched by bleach...
+    length: int = len(part)
+    index: int = 0
+    entity: str = ""
+
+    if part.startswith("#"):
+        entity = "#"
+        index = 1
+        allowed: frozenset[str] = DIGITS
+
+        if part[1:2] in {"x", "X"}:
+            entity += part[1]
+            index = 2
+            allowed = HEX_DIGITS
+
+        while index < length and part[index] not in ENTITY_END:
+            char: str = part[index]
+            index += 1
+
+            if char not in allowed:
+                break
+            entity += char
+
+        return entity if index < length and part[index] == ";" else None
+
+    while index < length and part[index] not in ENTITY_END:
+        entity += part[index]
+        index += 1
+
+        if entity not in ENTITY_PREFIXES:
+            return None
+
+    return entity if entity and index < length and part[index] == ";" else None
+
+
+def _serialize(text: str, /) -> list[str]:
+    # The strings bleach's serializer emits for a text node. Leading and trailing whitespace are emitted on their own
+    # and the entities bleach keeps split the text between, which is escaped...
+    stripped: str = text.lstrip(SPACE)
+    leading: str = text[: len(text) - len(stripped)]
+    middle: str = stripped.rstrip(SPACE)
+    trailing: str = stripped[len(middle) :]
+
+    head, *parts = INVISIBLE_RE.sub("?", middle).split("&")
+    tokens: list[str] = [leading] if leading else []
+    run: list[str] = [html.escape(head, quote=False)]
+
+    for part in parts:
+        entity: str | None = _match_entity(part)
+
+        if entity is None:
+            run.append("&amp;" + html.escape(part, quote=False))
+            continue
+
+        if entity == "amp":
+            run.append("&amp;" + html.escape(part[4:], quote=False))
+            continue
+
+        if text_run := "".join(run):
+            tokens.append(text_run)
+
+        tokens.append(f"&{entity};")
+        run = [html.escape(part[len(entity) + 1 :], quote=False)]
+
+    if text_run := "".join(run):
+        tokens.append(text_run)
+
+    if trailing:
+        tokens.append(trailing)
+
+    return tokens
+
+
+def _convert_entity(entity: str, /) -> bool:
+    # Whether bleach can resolve an entity it matched, which is only checked in the attribute handling below...
+    if not entity.startswith("#"):
+        return entity in html.entities.html5
+
+    hexadecimal: bool = entity[1:2] in {"x", "X"}
+    digits: str = entity[2:] if hexadecimal else entity[1:]
+    return bool(digits) and 0 < int(digits, 16 if hexadecimal else 10) < 0x110000
+
+
+def _escape_base_amp(piece: str, /) -> str:
+    # bleach re-escapes a string it takes for an attribute value, leaving only entities it can resolve...
+    head, *parts = piece.replace("&amp;", "&").split("&")
+    escaped: list[str] = [head]
+
+    for part in parts:
+        entity: str | None = _match_entity(part)
+
+        if entity is not None and _convert_entity(entity):
+            escaped.extend((f"&{entity};", part[len(entity) + 1 :]))
+        else:
+            escaped.append("&amp;" + part)
+
+    return "".join(escaped)
+
+
+def escape_content(content: str, /) -> str:
+    """Escape the content of a file for display.
+
+    The output is identical to that of ``bleach.clean`` with no tags or attributes allowed and comments kept, after
+    ``<!`` and ``&#xa;`` have been escaped in the content.
+
+    Returns
+    -------
+    :class:`str`
+        The escaped content.
+    """
+    content = content.replace("<!", "&lt;&#33;").replace("&#xa;", "&amp;#xa;")
+    # The HTML input stream normalises newlines before tokenizing...
+    content = content.replace("\r\n", "\n").replace("\r", "\n")
+
+    nodes: list[str] = _tokenize(content) if "<" in content or "\x00" in content else [content]
+    output: list[str] = _serialize(nodes[0])
+
+    # bleach takes the first comment for the start of a tag, which it never sees the end of. From then on, the string
+    # following a lone "=" is treated as an attribute value, unless it is a lone quote...
+    after_equals: bool = False
+
+    for index, node in enumerate(nodes[1:], start=1):
+        for piece in [f"<!--{html.escape(node)}-->"] if index % 2 else _serialize(node):
+            if after_equals and piece != '"':
+                output.append(_escape_base_amp(piece))
+                after_equals = False
+            else:
+                output.append(piece)
+                after_equals = after_equals or piece == "="
+
+    return "".join(output)
@@ -0,0 +1,191 @@
+"""MystBin. Share code easily.
+
+Copyright (C) 2020-Current PythonistaGuild
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import datetime
+import logging
+import operator
+import time
+from typing import TYPE_CHECKING
+
+import aiohttp
+import asyncpg
+
+if TYPE_CHECKING:
+    _Pool = asyncpg.Pool[asyncpg.Record]
+    from types_.config import Github
+    from types_.github import PostGist
+else:
+    _Pool = asyncpg.Pool
+
+
+LOGGER = logging.getLogger(__name__)
+
+__all__ = ("GistPoster",)
+
+
+class GistPoster:
+    """Posts the tokens found in public pastes to a public gist, which has their services invalidate them.
+
+    Tokens are queued in the ``token_queue`` table by the statement creating their paste, so they survive restarts and
+    any process can queue them. One gist is posted every ``timeout`` seconds, from the oldest queued tokens. Rows are
+    claimed in a short transaction, posted without holding a connection, and deleted once their gist was created. A
+    failed post releases them, and the claims of a process which stopped while posting expire after ``CLAIM_TIMEOUT``.
+
+    Failed posts are retried after the time GitHub asks for when rate limited, and with an exponential backoff
+    otherwise.
+    """
+
+    CLAIM_QUERY: str = """
+        UPDATE token_queue SET claimed_at = NOW()
+        WHERE id IN (
+            SELECT id FROM token_queue
+            WHERE claimed_at IS NULL OR claimed_at < NOW() - make_interval(secs => $2)
+            ORDER BY id LIMIT $1 FOR UPDATE SKIP LOCKED
+        )
+        RETURNING id, paste_id, tokens
+    """
+    RELEASE_QUERY: str = """UPDATE token_queue SET claimed_at = NULL WHERE id = ANY($1::bigint[])"""
+    DELETE_QUERY: str = """DELETE FROM token_queue WHERE id = ANY($1::bigint[])"""
+
+    # GitHub truncates gist files larger than 1 MB, which would hide the tokens past that point...
+    MAX_CONTENT: int = 900_000
+    BATCH: int = 500
+    MAX_BACKOFF: float = 3600
+    # Longer than a post may take, see `_post`...
+    CLAIM_TIMEOUT: float = 300
+
+    def __init__(self, session: aiohttp.ClientSession, /, *, config: Github, root_url: str) -> None:
+        self._session: aiohttp.ClientSession = session
+        self._token: str = config["token"]
+        self._interval: float = config["timeout"]
+        self._url: str = config.get("api_url", "https://api.github.com").rstrip("/") + "/gists"
+        self._root_url: str = root_url
+        self._failures: int = 0
+
+        self.posted: int = 0
+
+    def _payload(self, rows: list[asyncpg.Record], /) -> tuple[PostGist, list[int]]:
+        # As many pastes as fit in one file, the rest wait for the next gist...
+        entries: list[str] = []
+        ids: list[int] = []
+        size: int = 0
+
+        for row in rows:
+            entry: str = f"{self._root_url}/{row['paste_id']}:\n" + "\n".join(row["tokens"])
+            size += len(entry.encode()) + 2
+
+            if ids and size > self.MAX_CONTENT:
+                break
+
+            entries.append(entry)
+            ids.append(row["id"])
+
+        filename: str = str(datetime.datetime.now(datetime.UTC)) + "-tokens.txt"
+        payload: PostGist = {
+            "description": (
+                "MystBin found these Discord tokens in a public paste, and posted them here to invalidate them. "
+                "If you intended to share these, please apply a password to the paste."
+            ),
+            "files": {filename: {"content": "\n\n".join(entries)}},
+            "public": True,
+        }
+
+        return payload, ids
+
+    def _backoff(self, response: aiohttp.ClientResponse | None, /) -> float:
+        # GitHub names the time to wait when rate limiting, either in seconds or as the time the limit resets...
+        self._failures += 1
+
+        if response is not None:
+            if (retry := response.headers.get("Retry-After", "")).isdigit():
+                return float(retry)
+
+            if response.headers.get("X-RateLimit-Remaining") == "0" and (reset := response.headers.get("X-RateLimit-Reset")):
+                return max(int(reset) - time.time(), 1)
+
+        return min(self._interval * 2**self._failures, self.MAX_BACKOFF)
+
+    async def _post(self, payload: PostGist, /) -> float | None:
+        # Returns how long to wait before trying again, or None when the gist was created...
+        headers: dict[str, str] = {
+            "Accept": "application/vnd.github+json",
+            "Authorization": f"Bearer {self._token}",
+            "X-GitHub-Api-Version": "2022-11-28",
+        }
+
+        try:
+            async with self._session.post(
+                self._url, headers=headers, json=payload, timeout=aiohttp.ClientTimeout(total=30)
+            ) as resp:
+                if resp.ok:
+                    return None
+
+                LOGGER.error(
+                    "Failed to create a gist of tokens with response status code %s and response body:\n\n%s",
+                    resp.status,
+                    await resp.text(),
+                )
+                return self._backoff(resp)
+        except (aiohttp.ClientError, TimeoutError) as error:
+            LOGGER.exception("Failed to handle gist creation due to a client or operating system error", exc_info=error)
+            return self._backoff(None)
+
+    async def flush(self, pool: _Pool, /) -> float:
+        """Post one gist of queued tokens, if there are any.
+
+        Returns
+        -------
+        :class:`float`
+            How long to wait, in seconds, before the next gist is posted.
+        """
+        # Claiming is a transaction of its own, nothing is held while the gist is posted...
+        rows: list[asyncpg.Record] = await pool.fetch(self.CLAIM_QUERY, self.BATCH, self.CLAIM_TIMEOUT)
+        if not rows:
+            return self._interval
+
+        rows.sort(key=operator.itemgetter("id"))  # RETURNING gives no order, the oldest tokens go first
+        payload, ids = self._payload(rows)
+
+        if len(ids) < len(rows):
+            await pool.execute(self.RELEASE_QUERY, [row["id"] for row in rows[len(ids) :]])
+
+        if (delay := await self._post(payload)) is not None:
+            await pool.execute(self.RELEASE_QUERY, ids)
+            LOGGER.warning("Tokens from %s pastes stay queued, retrying in %.0f seconds.", len(ids), delay)
+            return delay
+
+        await pool.execute(self.DELETE_QUERY, ids)
+
+        self._failures = 0
+        self.posted += len(ids)
+        LOGGER.info("Gist created and invalidated tokens from %s pastes.", len(ids))
+
+        return self._interval
+
+    async def run(self, pool: _Pool, /) -> None:
+        while True:
+            try:
+                delay: float = await self.flush(pool)
+            except (asyncpg.PostgresError, OSError) as error:
+                LOGGER.exception("Failed to read queued tokens.", exc_info=error)
+                delay = self._interval
+
+            await asyncio.sleep(delay)
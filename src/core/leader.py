@@ -0,0 +1,97 @@
+"""MystBin. Share code easily.
+
+Copyright (C) 2020-Current PythonistaGuild
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING
+
+import asyncpg
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Coroutine
+
+
+LOGGER = logging.getLogger(__name__)
+
+__all__ = ("Leadership",)
+
+
+class Leadership:
+    """Elects one process, of all processes sharing the database, to perform the singleton duties.
+
+    The leader holds a transaction level advisory lock, in a transaction left open on a connection of its own. Behind a
+    transaction pooler this keeps the lock with the session that took it. The transaction holds no snapshot, so it
+    does not hold back vacuum. The database releases the lock when the connection is lost, and another process takes
+    over when it next tries for the lock. The leader checks its connection every ``interval`` seconds and stops its
+    duties when the check fails, as it may no longer hold the lock.
+    """
+
+    QUERY: str = """SELECT pg_try_advisory_xact_lock($1)"""
+
+    # Any number works, as long as every process uses the same one and nothing else does...
+    KEY: int = 0x4D797374_42696E00
+
+    def __init__(self, dsn: str, /, *, interval: float) -> None:
+        self._dsn: str = dsn
+        self._interval: float = interval
+        self._leader: bool = False
+
+    @property
+    def leader(self) -> bool:
+        return self._leader
+
+    async def _lead(self, connection: asyncpg.Connection[asyncpg.Record], duties: asyncio.Task[None], /) -> None:
+        self._leader = True
+        LOGGER.info("This process was elected leader and performs the singleton duties.")
+
+        try:
+            while not duties.done():
+                await asyncio.wait({duties}, timeout=self._interval)
+                await connection.execute("SELECT 1", timeout=self._interval)
+        finally:
+            self._leader = False
+            duties.cancel()
+
+        if not duties.cancelled() and (error := duties.exception()):
+            LOGGER.error("The duties of the leader failed, stepping down.", exc_info=error)
+
+    async def _campaign(self, duties: Callable[[], Coroutine[None, None, None]], /) -> None:
+        connection: asyncpg.Connection[asyncpg.Record] = await asyncpg.connect(self._dsn, statement_cache_size=0)
+
+        try:
+            while True:
+                async with connection.transaction():
+                    if await connection.fetchval(self.QUERY, self.KEY, timeout=self._interval):
+                        await self._lead(connection, asyncio.create_task(duties()))
+                        return
+
+                await asyncio.sleep(self._interval)
+        finally:
+            # The lock is released with the connection, even when it can no longer be reached to end the transaction...
+            connection.terminate()
+
+    async def run(self, duties: Callable[[], Coroutine[None, None, None]], /) -> None:
+        while True:
+            try:
+                await self._campaign(duties)
+            except (asyncpg.PostgresError, asyncpg.InterfaceError, OSError, TimeoutError) as error:
+                LOGGER.warning("Lost the connection used for leader election: %s", error)
+
+            await asyncio.sleep(self._interval)
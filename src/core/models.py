@@ -17,38 +17,55 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
 import datetime
-from collections.abc import Iterator, Mapping
-from typing import Any
+from collections.abc import Collection, Iterator, Mapping
+from typing import Any, ClassVar
 
 import asyncpg
 
+from .serialization import dumps
+from .storage import decompress_content, dictionary_id
+
 __all__ = ("FileModel", "PasteModel")
 
 
 class BaseModel(Mapping[str, Any]):
+    """A mapping over a record, which is kept as it is rather than copied.
+
+    Values are read from the record when they are used. Keys in ``HIDDEN`` are read by the model itself and are not
+    part of the mapping.
+    """
+
     __slots__ = ("record",)
 
-    def __init__(self, record: asyncpg.Record | dict[str, Any], /) -> None:
-        self.record: dict[str, Any] = dict(record)
+    HIDDEN: ClassVar[frozenset[str]] = frozenset()
+
+    def __init__(self, record: asyncpg.Record | Mapping[str, Any], /) -> None:
+        self.record: asyncpg.Record | Mapping[str, Any] = record
 
     def __getitem__(self, key: str) -> Any:  # noqa: ANN401 # this is due to the dynamic nature of the mapping and Record types.
+        if key in self.HIDDEN:
+            raise KeyError(key)
+
         return self.record[key]
 
     def __iter__(self) -> Iterator[str]:
-        return iter(self.record)
+        # Records iterate over their values, their keys are iterated explicitly...
+        return (key for key in self.record.keys() if key not in self.HIDDEN)  # noqa: SIM118 # see above
 
     def __len__(self) -> int:
-        return len(self.record)
+        return sum(1 for _ in self)
 
     def serialize(self, *, exclude: list[str] | None = None) -> dict[str, Any]:
         exclude = exclude or ["file_index"]
 
         new: dict[str, Any] = {}
 
-        for key, value in self.record.items():
+        for key in self:
             if key in exclude:
                 continue
 
+            value: Any = self[key]
+
             if isinstance(value, datetime.datetime):
                 new[key] = value.isoformat()
             else:
@@ -59,35 +76,156 @@ class BaseModel(Mapping[str, Any]):
 
         return new
 
+    def _plain(self, exclude: Collection[str]) -> dict[str, Any]:
+        # Values are left as they are, the encoder writes datetimes itself. orjson encodes neither records nor mappings
+        # other than dicts, and a `default` hook would have to return a dict as well. The dict only refers to the values,
+        # building it is a few percent of encoding a paste...
+        new: dict[str, Any] = {key: self[key] for key in self if key not in exclude}
+
+        if isinstance(self, PasteModel) and self.files and "files" not in exclude:
+            new["files"] = [f._plain(("file_index",)) for f in self.files]  # noqa: SLF001 # same base class
+
+        return new
+
+    def json(self, *, exclude: Collection[str] = ("file_index",)) -> bytes:
+        """Encode the model as JSON, with the same output as encoding :meth:`serialize`.
+
+        This skips converting every value in Python first. ``files`` can be excluded as well.
+
+        Returns
+        -------
+        :class:`bytes`
+        """
+        return dumps(self._plain(exclude))
+
 
 class FileModel(BaseModel):
     """Model that represents a mystbin File."""
 
-    def __init__(self, record: asyncpg.Record | dict[str, Any]) -> None:
+    __slots__ = ("_content",)
+
+    HIDDEN: ClassVar[frozenset[str]] = frozenset(("compressed",))
+
+    def __init__(self, record: asyncpg.Record | Mapping[str, Any]) -> None:
         super().__init__(record)
+        self._content: str | None = None
+
+    def __getitem__(self, key: str) -> Any:  # noqa: ANN401 # this is due to the dynamic nature of the mapping and Record types.
+        if key == "content":
+            return self.content
+
+        return super().__getitem__(key)
+
+    @property
+    def parent_id(self) -> str:
+        return self.record["parent_id"]
+
+    @property
+    def filename(self) -> str:
+        return self.record["filename"]
+
+    @property
+    def loc(self) -> int:
+        return self.record["loc"]
+
+    @property
+    def charcount(self) -> int:
+        return self.record["charcount"]
+
+    @property
+    def index(self) -> int:
+        return self.record["file_index"]
 
-        self.parent_id: str = record["parent_id"]
-        self.content: str = record["content"]
-        self.filename: str = record["filename"]
-        self.loc: int = record["loc"]
-        self.charcount: int = record["charcount"]
-        self.index: int = record["file_index"]
-        self.annotation: str | None = record["annotation"]
-        self.warning_positions: list[int] = record["warning_positions"]
+    @property
+    def annotation(self) -> str | None:
+        return self.record["annotation"]
+
+    @property
+    def warning_positions(self) -> list[int]:
+        return self.record["warning_positions"]
+
+    @property
+    def content_hash(self) -> str | None:
+        return self.record.get("content_hash")
+
+    @property
+    def dictionary(self) -> int:
+        """The id of the dictionary the content was compressed with, ``0`` when there is none."""
+        if self._content is not None or (compressed := self.record.get("compressed")) is None:
+            return 0
+
+        return dictionary_id(compressed)
+
+    @property
+    def content(self) -> str:
+        # Compressed content is only decompressed once it is first used, and kept by the model...
+        if self._content is not None:
+            return self._content
+
+        compressed: bytes | None = self.record.get("compressed")
+        if compressed is None:
+            return self.record["content"]
+
+        self._content = decompress_content(compressed)
+        return self._content
 
 
 class PasteModel(BaseModel):
     """Model that represents a mystbin Paste."""
 
-    def __init__(self, record: asyncpg.Record) -> None:
+    __slots__ = ("_views", "files")
+
+    # files may be aggregated into the paste row by the query...
+    HIDDEN: ClassVar[frozenset[str]] = frozenset(("files",))
+
+    def __init__(self, record: asyncpg.Record | Mapping[str, Any]) -> None:
         super().__init__(record)
 
-        self.id: str = record["id"]
-        self.created_at: datetime.datetime = record["created_at"]
-        self.expires: datetime.datetime | None = record["expires"]
-        self.password: str | None = record["password"]
-        self.views: int = record["views"]
-        self.safety: str = record["safety"]
-        self.has_password: bool | None = record.get("has_password", None)
-        self.password_ok: bool | None = record.get("password_ok", None)
-        self.files: list[FileModel] = []
+        self._views: int = record["views"]
+        self.files: list[FileModel] = [FileModel(f) for f in record.get("files") or ()]
+
+    def __getitem__(self, key: str) -> Any:  # noqa: ANN401 # this is due to the dynamic nature of the mapping and Record types.
+        if key == "views":
+            return self._views
+
+        return super().__getitem__(key)
+
+    @property
+    def id(self) -> str:
+        return self.record["id"]
+
+    @property
+    def created_at(self) -> datetime.datetime:
+        return self.record["created_at"]
+
+    @property
+    def expires(self) -> datetime.datetime | None:
+        return self.record["expires"]
+
+    @property
+    def password(self) -> str | None:
+        return self.record["password"]
+
+    @property
+    def views(self) -> int:
+        return self._views
+
+    @views.setter
+    def views(self, value: int) -> None:
+        self._views = value
+
+    @property
+    def safety(self) -> str:
+        return self.record["safety"]
+
+    @property
+    def etag(self) -> str | None:
+        return self.record.get("etag")
+
+    @property
+    def has_password(self) -> bool | None:
+        return self.record.get("has_password")
+
+    @property
+    def password_ok(self) -> bool | None:
+        return self.record.get("password_ok")
@@ -0,0 +1,94 @@
+"""MystBin. Share code easily.
+
+Copyright (C) 2020-Current PythonistaGuild
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import asyncpg
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    _Pool = asyncpg.Pool[asyncpg.Record]
+    from types_.config import Database as DatabaseConfig
+else:
+    _Pool = asyncpg.Pool
+
+
+__all__ = ("SCHEMA_LOCK", "create_pool")
+
+
+# Applying the schema takes this advisory lock, and preparing queries shares it, as both lock tables in any order...
+SCHEMA_LOCK = 0x4D797374_536368
+
+# Queries are prepared through a private method of asyncpg, only with the versions it is known to work with...
+_PREPARES: bool = (0, 29) <= tuple(int(part) for part in asyncpg.__version__.split(".")[:2]) < (0, 33)
+
+
+async def _prepare_queries(connection: asyncpg.Connection[asyncpg.Record], queries: Sequence[str], /) -> None:
+    """Prepare the hot queries once, when a connection is opened.
+
+    asyncpg otherwise prepares a query the first time a connection runs it, which puts that cost on a request. The
+    queries are prepared into the statement cache of the connection, which keeps them across uses of the connection
+    from the pool and prepares them again when the schema changes.
+    """
+    async with connection.transaction():
+        await connection.execute(f"SELECT pg_advisory_xact_lock_shared({SCHEMA_LOCK})")
+
+        # `prepare` would return statements that asyncpg invalidates once the connection is released to the pool,
+        # and they would not be in the statement cache that `fetch` and the like look in...
+        for query in queries:
+            await connection._get_statement(query, None)  # noqa: SLF001 # pyright: ignore[reportPrivateUsage, reportAttributeAccessIssue, reportUnknownMemberType] # see _PREPARES
+
+
+async def create_pool(dsn: str, /, *, config: DatabaseConfig, prepare: Sequence[str] = ()) -> _Pool:
+    """Create a connection pool sized and tuned by the ``[DATABASE]`` config key.
+
+    Behind a transaction pooler such as PgBouncer, set ``pgbouncer``. Connections then run every query as an unnamed
+    statement, as consecutive queries may be sent to different servers, and nothing is prepared ahead of time. Queries
+    are not prepared ahead of time either with asyncpg versions that are not known to support it.
+
+    Returns
+    -------
+    :class:`asyncpg.Pool`
+
+    Raises
+    ------
+    RuntimeError
+        The pool could not be created.
+    """
+    pgbouncer: bool = config.get("pgbouncer", False)
+
+    async def init(connection: asyncpg.Connection[asyncpg.Record]) -> None:
+        await _prepare_queries(connection, prepare)
+
+    pool: _Pool | None = await asyncpg.create_pool(
+        dsn=dsn,
+        min_size=config.get("min_size", 10),
+        max_size=config.get("max_size", 10),
+        max_inactive_connection_lifetime=config.get("max_inactive_connection_lifetime", 300),
+        statement_cache_size=0 if pgbouncer else config.get("statement_cache_size", 100),
+        init=init if prepare and _PREPARES and not pgbouncer else None,
+    )
+
+    if not pool:
+        msg_ = "Failed to connect to the database... No additional information."
+        raise RuntimeError(msg_)
+
+    return pool
@@ -0,0 +1,123 @@
+"""MystBin. Share code easily.
+
+Copyright (C) 2020-Current PythonistaGuild
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from .scanners import SecurityInfo, Services
+from .storage import ContentStorage, compress_content
+
+if TYPE_CHECKING:
+    from types_.config import Pastes
+    from types_.scanner import ScannerSecret
+
+
+__all__ = ("PreparedFile", "create_executor", "prepare_files")
+
+
+class PreparedFile(NamedTuple):
+    content: str
+    filename: str
+    loc: int
+    annotation: str
+    positions: list[int]
+    tokens: list[str]
+    content_hash: str
+    charcount: int
+    compressed: bytes | None
+
+
+def create_executor(config: Pastes, /) -> Executor | None:
+    """Create the executor used to prepare files, as configured in the ``[PASTES]`` config key.
+
+    Returns
+    -------
+    :class:`concurrent.futures.Executor` | None
+        The executor, or ``None`` to use the default executor of the event loop.
+    """
+    kind: str = config.get("executor", "thread")
+    workers: int | None = config.get("workers")
+
+    if kind == "process":
+        # Forking a process with a running event loop is unsafe...
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+    if workers:
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mystbin-files")
+
+    return None
+
+
+def prepare_file(
+    index: int,
+    file: dict[str, Any],
+    /,
+    *,
+    name_limit: int,
+    storage: ContentStorage | None = None,
+) -> PreparedFile:
+    name: str = (file.get("filename") or f"file_{index}")[-name_limit:]
+    name = "_".join(name.splitlines())
+
+    # Normalise newlines...
+    content: str = file["content"].replace("\r\n", "\n").replace("\r", "\n")
+    loc: int = file["content"].count("\n") + 1
+
+    positions: list[int] = []
+    tokens: list[str] = []
+    extra: str = ""
+
+    secrets: list[ScannerSecret] = SecurityInfo.scan_file(content)
+    for payload in secrets:
+        service: Services = payload["service"]
+
+        extra += f"{service.value}, "
+        positions += [t[0] for t in payload["tokens"]]
+
+        if service is Services.discord:
+            tokens += [t[1] for t in payload["tokens"]]
+
+    extra = extra.removesuffix(", ")
+    annotation = f"Contains possibly sensitive data from: {extra}" if extra else ""
+
+    content_hash: str = hashlib.sha256(content.encode()).hexdigest()
+    compressed: bytes | None = compress_content(content, storage) if storage else None
+
+    return PreparedFile(content, name, loc, annotation, sorted(positions), tokens, content_hash, len(content), compressed)
+
+
+def prepare_files(
+    files: list[dict[str, Any]],
+    /,
+    *,
+    name_limit: int,
+    storage: ContentStorage | None = None,
+) -> list[PreparedFile]:
+    """Normalise, count, scan and hash the files of a new paste, compressing them when a storage is given.
+
+    This is CPU bound and is run in an executor, away from the event loop.
+
+    Returns
+    -------
+    list[:class:`PreparedFile`]
+    """
+    return [prepare_file(index, file, name_limit=name_limit, storage=storage) for index, file in enumerate(files, 1)]
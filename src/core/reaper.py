@@ -0,0 +1,142 @@
+"""MystBin. Share code easily.
+
+Copyright (C) 2020-Current PythonistaGuild
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import datetime
+import logging
+from typing import TYPE_CHECKING
+
+import asyncpg
+
+if TYPE_CHECKING:
+    _Pool = asyncpg.Pool[asyncpg.Record]
+else:
+    _Pool = asyncpg.Pool
+
+
+LOGGER = logging.getLogger(__name__)
+
+__all__ = ("ExpiryReaper",)
+
+
+class ExpiryReaper:
+    """Deletes expired pastes in the background.
+
+    Reads already ignore expired pastes, this only reclaims their rows. Every ``interval`` seconds expired pastes are
+    deleted in batches of at most ``batch``, so a large backlog never holds its locks for long. Several processes can
+    reap at once, rows another process is deleting are skipped.
+
+    When the tables are partitioned, see ``partitioning.sql``, partitions are also created ahead of time and whole
+    partitions are dropped once all of their pastes have expired or they are older than ``retention`` days. With a
+    retention, expired pastes are left for their partition to be dropped instead of being deleted one by one.
+    """
+
+    QUERY: str = """
+        DELETE FROM pastes WHERE (id, created_at) IN (
+            SELECT id, created_at FROM pastes WHERE expires <= NOW() ORDER BY expires LIMIT $1 FOR UPDATE SKIP LOCKED
+        )
+    """
+    PARTITIONED_QUERY: str = """SELECT relkind = 'p' FROM pg_class WHERE oid = 'pastes'::regclass"""
+    CREATE_QUERY: str = """SELECT create_paste_partitions(NOW() AT TIME ZONE 'UTC', $1)"""
+    DETACH_QUERY: str = """SELECT detach_paste_partition($1::interval)"""
+    DROP_QUERY: str = """SELECT drop_detached_partitions()"""
+
+    # Months of partitions created in advance, so pastes never have to fall back to the default partition...
+    PARTITIONS_AHEAD: int = 2
+
+    def __init__(self, *, interval: float, batch: int, retention: float | None = None) -> None:
+        self._interval: float = interval
+        self._batch: int = batch
+        self._retention: datetime.timedelta | None = datetime.timedelta(days=retention) if retention else None
+
+        # Kept for monitoring, these only count the pastes deleted by this process...
+        self.reclaimed: int = 0
+        self.dropped: list[str] = []
+        self.last_run: datetime.datetime | None = None
+
+    async def reap(self, pool: _Pool, /) -> int:
+        """Delete every paste which has expired, one batch at a time.
+
+        Returns
+        -------
+        :class:`int`
+            The amount of pastes deleted.
+        """
+        total: int = 0
+
+        while True:
+            try:
+                status: str = await pool.execute(self.QUERY, self._batch)
+            except (asyncpg.PostgresError, OSError) as error:
+                LOGGER.exception("Failed to delete expired pastes after reclaiming %s.", total, exc_info=error)
+                break
+
+            deleted: int = int(status.rpartition(" ")[2])
+            total += deleted
+
+            if deleted < self._batch:
+                break
+
+        self.reclaimed += total
+        self.last_run = datetime.datetime.now(tz=datetime.UTC)
+
+        if total:
+            LOGGER.info("Reclaimed %s expired pastes, %s since startup.", total, self.reclaimed)
+
+        return total
+
+    async def maintain(self, pool: _Pool, /) -> None:
+        """Create the upcoming partitions and drop every partition that is no longer needed."""
+        try:
+            created: int = await pool.fetchval(self.CREATE_QUERY, self.PARTITIONS_AHEAD)
+        except (asyncpg.PostgresError, OSError) as error:
+            LOGGER.exception("Failed to create the upcoming paste partitions.", exc_info=error)
+        else:
+            if created:
+                LOGGER.info("Created partitions for %s months.", created)
+
+        # One partition per transaction, so locks are held briefly and a failure only affects one of them.
+        # Partitions are detached first, so the slower drop does not hold locks on the parent tables...
+        while True:
+            try:
+                name: str | None = await pool.fetchval(self.DETACH_QUERY, self._retention)
+                dropped: list[str] = [r[0] for r in await pool.fetch(self.DROP_QUERY)]
+            except (asyncpg.PostgresError, OSError) as error:
+                LOGGER.exception("Failed to drop a paste partition.", exc_info=error)
+                return
+
+            self.dropped.extend(dropped)
+            for partition in dropped:
+                LOGGER.info("Dropped the partition %s.", partition)
+
+            if not name:
+                return
+
+    async def run(self, pool: _Pool, /) -> None:
+        partitioned: bool = await pool.fetchval(self.PARTITIONED_QUERY)
+
+        while True:
+            if partitioned:
+                await self.maintain(pool)
+
+            if not (partitioned and self._retention):
+                await self.reap(pool)
+
+            await asyncio.sleep(self._interval)
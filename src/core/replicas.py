@@ -0,0 +1,201 @@
+"""MystBin. Share code easily.
+
+Copyright (C) 2020-Current PythonistaGuild
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Any, Literal
+
+import asyncpg
+
+from .pool import create_pool
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    _Pool = asyncpg.Pool[asyncpg.Record]
+    from types_.config import Database as DatabaseConfig
+else:
+    _Pool = asyncpg.Pool
+
+
+LOGGER = logging.getLogger(__name__)
+
+__all__ = ("ReplicaRouter",)
+
+# A replica which fails with one of these is taken out of rotation until it passes a health check again...
+CONNECTION_ERRORS = (OSError, TimeoutError, asyncpg.PostgresConnectionError, asyncpg.InterfaceError)
+
+
+class ReplicaRouter:
+    """Sends reads to healthy read replicas in turn, and to the primary when there are none.
+
+    Replicas are checked every ``interval`` seconds. A replica which can not be reached, was promoted, or has fallen
+    more than ``max_lag`` seconds behind is left out until a later check finds it healthy again. A replica which fails
+    a read is left out immediately, and the primary answers that read instead.
+
+    A replica which does not find a row may not have replayed it yet, so the primary is asked as well. Newly created
+    pastes can therefore always be read, at the cost of a second query for ids which do not exist.
+    """
+
+    # Replay lag is only meaningful while received WAL waits to be replayed, an idle primary sends nothing to replay...
+    HEALTH_QUERY: str = """
+        SELECT pg_is_in_recovery() AS recovery,
+        CASE WHEN pg_last_wal_receive_lsn() <= pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM NOW() - pg_last_xact_replay_timestamp()) END AS lag
+    """
+
+    def __init__(self, dsns: Sequence[str], /, *, interval: float, max_lag: float) -> None:
+        self._dsns: tuple[str, ...] = tuple(dsns)
+        self._interval: float = interval
+        self._max_lag: float = max_lag
+        self._primary: _Pool | None = None
+        self._pools: dict[str, _Pool] = {}
+        self._healthy: list[_Pool] = []
+        self._turn: int = 0
+        self._config: DatabaseConfig | None = None
+        self._prepare: Sequence[str] = ()
+
+    def __bool__(self) -> bool:
+        return bool(self._dsns)
+
+    @property
+    def primary(self) -> _Pool:
+        if not self._primary:
+            msg_ = "The replica router has not been opened yet."
+            raise RuntimeError(msg_)
+
+        return self._primary
+
+    @property
+    def healthy(self) -> int:
+        return len(self._healthy)
+
+    async def open(self, primary: _Pool, /, *, config: DatabaseConfig, prepare: Sequence[str] = ()) -> None:
+        # A replica which is down at startup does not stop the server, it is connected to by a later check...
+        self._primary = primary
+        self._config = config
+        self._prepare = prepare
+
+        await self.check()
+
+    async def close(self) -> None:
+        self._healthy = []
+        pools: list[_Pool] = list(self._pools.values())
+        self._pools = {}
+
+        await asyncio.gather(*(p.close() for p in pools), return_exceptions=True)
+
+    async def _connect(self, dsn: str, /) -> _Pool | None:
+        if self._config is None:
+            return None
+
+        try:
+            pool: _Pool = await asyncio.wait_for(
+                create_pool(dsn, config=self._config, prepare=self._prepare), timeout=self._interval
+            )
+        except (RuntimeError, asyncpg.PostgresError, *CONNECTION_ERRORS) as error:
+            LOGGER.warning("Failed to connect to a read replica: %s", error)
+            return None
+
+        self._pools[dsn] = pool
+        return pool
+
+    async def _check(self, dsn: str, /) -> _Pool | None:
+        pool: _Pool | None = self._pools.get(dsn) or await self._connect(dsn)
+        if not pool:
+            return None
+
+        try:
+            record: asyncpg.Record | None = await pool.fetchrow(self.HEALTH_QUERY, timeout=self._interval)
+        except (asyncpg.PostgresError, *CONNECTION_ERRORS) as error:
+            LOGGER.warning("Health check of a read replica failed: %s", error)
+            return None
+
+        if not record or not record["recovery"]:
+            LOGGER.warning("A read replica is not in recovery, it may have been promoted. Reads are not sent to it.")
+            return None
+
+        if record["lag"] is not None and record["lag"] > self._max_lag:
+            LOGGER.warning("A read replica is %.1f seconds behind. Reads are not sent to it.", record["lag"])
+            return None
+
+        return pool
+
+    async def check(self) -> None:
+        results: list[_Pool | None] = await asyncio.gather(*(self._check(dsn) for dsn in self._dsns))
+        healthy: list[_Pool] = [p for p in results if p]
+
+        if len(healthy) != len(self._healthy):
+            LOGGER.info("%s of %s read replicas are healthy.", len(healthy), len(self._dsns))
+
+        self._healthy = healthy
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval)
+            await self.check()
+
+    def _choose(self) -> _Pool | None:
+        if not self._healthy:
+            return None
+
+        self._turn = (self._turn + 1) % len(self._healthy)
+        return self._healthy[self._turn]
+
+    def _fail(self, pool: _Pool, error: BaseException, /) -> None:
+        if pool in self._healthy:
+            self._healthy.remove(pool)
+            LOGGER.warning("A read replica failed, reads are not sent to it until it is healthy again: %s", error)
+
+    async def _read(self, method: Literal["fetchrow", "fetchval"], query: str, args: tuple[Any, ...]) -> Any:  # noqa: ANN401 # asyncpg values are untyped
+        replica: _Pool | None = self._choose()
+
+        if replica:
+            try:
+                result: Any = await getattr(replica, method)(query, *args)
+            except CONNECTION_ERRORS as error:
+                self._fail(replica, error)
+            except asyncpg.PostgresError as error:
+                # Queries on a replica can be cancelled by replay, the primary answers them instead...
+                LOGGER.debug("A read replica could not answer a read: %s", error)
+            else:
+                if result is not None:
+                    return result
+
+        return await getattr(self.primary, method)(query, *args)
+
+    async def fetchrow(self, query: str, /, *args: Any) -> asyncpg.Record | None:
+        """Run a read only query on a replica, or on the primary when no replica has the row.
+
+        Returns
+        -------
+        :class:`asyncpg.Record` | None
+        """
+        return await self._read("fetchrow", query, args)
+
+    async def fetchval(self, query: str, /, *args: Any) -> Any:  # noqa: ANN401 # asyncpg values are untyped
+        """Run a read only query on a replica, or on the primary when no replica has a value.
+
+        Returns
+        -------
+        Any
+            The first column of the first row, or ``None`` when even the primary has no row.
+        """
+        return await self._read("fetchval", query, args)
@@ -21,11 +21,16 @@ from __future__ import annotations
 import base64
 import binascii
 import enum
+import functools
 import logging
 import re
+import string
+import sys
 from typing import TYPE_CHECKING, ClassVar
 
 if TYPE_CHECKING:
+    from collections.abc import Iterator
+
     from types_.scanner import ScannerSecret
 
 
@@ -44,13 +49,37 @@ class BaseScanner:
     REGEX: ClassVar[re.Pattern[str]]
     SERVICE: ClassVar[Services]
 
+    # Every (ASCII) character a match can consist of and the length of the shortest possible match.
+    # Used by SecurityInfo to skip content which can not contain a match; scanners without an alphabet scan everything.
+    ALPHABET: ClassVar[str | None] = None
+    MIN_LENGTH: ClassVar[int] = 1
+    # Substrings of which at least one is present in every match, if any...
+    LITERALS: ClassVar[tuple[str, ...]] = ()
+
+    @classmethod
+    def validate(cls, token: str) -> bool:  # noqa: ARG003 # overridden by scanners which validate their matches
+        return True
+
+    @classmethod
+    def find(cls, content: str, pos: int = 0, endpos: int = sys.maxsize) -> list[tuple[int, str]]:
+        return [(m.start(0), m.group(0)) for m in cls.REGEX.finditer(content, pos, endpos) if cls.validate(m.group(0))]
+
     @classmethod
     def match(cls, content: str) -> ScannerSecret:
-        matches: list[tuple[int, str]] = [(m.start(0), m.group(0)) for m in cls.REGEX.finditer(content)]
+        """Method to create an instance of a secret based on the incoming data.
+
+        Parameters
+        ----------
+        content: :class:`str`
+            The incoming data.
 
+        Returns
+        -------
+        :class:`ScannerSecret`
+        """
         payload: ScannerSecret = {
             "service": cls.SERVICE,
-            "tokens": matches,
+            "tokens": cls.find(content),
         }
 
         return payload
@@ -61,6 +90,9 @@ class DiscordScanner(BaseScanner):
 
     REGEX = re.compile(r"[a-zA-Z0-9_-]{23,28}\.[a-zA-Z0-9_-]{6,7}\.[a-zA-Z0-9_-]{27,}")
     SERVICE = Services.discord
+    ALPHABET = string.ascii_letters + string.digits + "_-."
+    MIN_LENGTH = 23 + 1 + 6 + 1 + 27
+    LITERALS = (".",)
 
     @staticmethod
     def validate_discord_token(token: str) -> bool:
@@ -85,28 +117,8 @@ class DiscordScanner(BaseScanner):
             return True
 
     @classmethod
-    def match(cls, content: str) -> ScannerSecret:
-        """Method to create an instance of a secret based on the incoming data.
-
-        Parameters
-        ----------
-        content: :class:`str`
-            The incoming data.
-
-        Returns
-        -------
-        :class:`ScannerSecret`
-        """
-        matches: list[tuple[int, str]] = [
-            (m.start(0), m.group(0)) for m in cls.REGEX.finditer(content) if cls.validate_discord_token(m.group(0))
-        ]
-
-        payload: ScannerSecret = {
-            "service": cls.SERVICE,
-            "tokens": matches,
-        }
-
-        return payload
+    def validate(cls, token: str) -> bool:
+        return cls.validate_discord_token(token)
 
 
 class PyPiScanner(BaseScanner):
@@ -114,6 +126,9 @@ class PyPiScanner(BaseScanner):
 
     REGEX = re.compile(r"pypi-AgEIcHlwaS5vcmc[A-Za-z0-9-_]{70,}")
     SERVICE = Services.pypi
+    ALPHABET = string.ascii_letters + string.digits + "_-"
+    MIN_LENGTH = len("pypi-AgEIcHlwaS5vcmc") + 70
+    LITERALS = ("pypi-AgEIcHlwaS5vcmc",)
 
 
 class GitHubScanner(BaseScanner):
@@ -121,6 +136,9 @@ class GitHubScanner(BaseScanner):
 
     REGEX = re.compile(r"((ghp|gho|ghu|ghs|ghr)_[A-Za-z0-9_]{36})")
     SERVICE = Services.github
+    ALPHABET = string.ascii_letters + string.digits + "_"
+    MIN_LENGTH = 4 + 36
+    LITERALS = ("ghp_", "gho_", "ghu_", "ghs_", "ghr_")
 
 
 class SecurityInfo:
@@ -130,6 +148,30 @@ class SecurityInfo:
         Services.github: GitHubScanner,
     }
 
+    @staticmethod
+    @functools.cache
+    def _mask_table(scanners: tuple[type[BaseScanner], ...], /) -> bytes:
+        # Maps every character of the combined alphabets to "a" and everything else to a space...
+        alphabet: set[int] = {ord(c) for s in scanners for c in s.ALPHABET or ""}
+        return bytes(0x61 if i in alphabet else 0x20 for i in range(256))
+
+    @classmethod
+    def _candidates(cls, file: str, scanners: tuple[type[BaseScanner], ...], /) -> Iterator[tuple[int, int]]:
+        # Every match of these scanners lies within a run of their combined alphabet at least this long.
+        # Encoding with "replace" keeps one byte per character, so offsets in the mask are offsets in the file...
+        length: int = min(s.MIN_LENGTH for s in scanners)
+        mask: bytes = file.encode("ascii", "replace").translate(cls._mask_table(scanners))
+        needle: bytes = b"a" * length
+
+        position: int = 0
+        while (start := mask.find(needle, position)) != -1:
+            end: int = mask.find(b" ", start + length)
+            if end == -1:
+                end = len(mask)
+
+            yield start, end
+            position = end
+
     @classmethod
     def scan_file(
         cls,
@@ -144,6 +186,9 @@ class SecurityInfo:
         You may pass a list of allowed or disallowed Services.
         If both lists are empty (Default) all available services will be scanned.
 
+        The content is traversed once to find runs of characters which could form a token. Each scanner then only
+        searches those runs, which gives the same results as scanning the entire content with every scanner.
+
         Returns
         -------
         :class:`list[:class:`ScannerSecret`]`
@@ -152,7 +197,7 @@ class SecurityInfo:
         allowed = allowed or list(Services)
 
         services: list[Services] = [s for s in allowed if s not in disallowed]
-        secrets: list[ScannerSecret] = []
+        scanners: list[type[BaseScanner]] = []
 
         for service in services:
             scanner: type[BaseScanner] | None = cls.__SERVICE_MAPPING.get(service, None)
@@ -160,8 +205,24 @@ class SecurityInfo:
                 LOGGER.warning("The provided service %r is not a supported or a valid service.", service)
                 continue
 
-            found: ScannerSecret = scanner.match(file)
-            if found["tokens"]:
-                secrets.append(found)
+            scanners.append(scanner)
+
+        found: dict[type[BaseScanner], list[tuple[int, str]]] = {s: [] for s in scanners}
+        filtered: tuple[type[BaseScanner], ...] = tuple(s for s in scanners if s.ALPHABET)
+
+        for scanner in scanners:
+            if scanner not in filtered:
+                found[scanner] = scanner.find(file)
+
+        if filtered:
+            for start, end in cls._candidates(file, filtered):
+                for scanner in filtered:
+                    if end - start < scanner.MIN_LENGTH:
+                        continue
+
+                    if scanner.LITERALS and not any(file.find(literal, start, end) != -1 for literal in scanner.LITERALS):
+                        continue
+
+                    found[scanner] += scanner.find(file, start, end)
 
-        return secrets
+        return [{"service": s.SERVICE, "tokens": tokens} for s, tokens in found.items() if tokens]
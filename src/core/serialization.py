@@ -0,0 +1,94 @@
+"""MystBin. Share code easily.
+
+Copyright (C) 2020-Current PythonistaGuild
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from __future__ import annotations
+
+import datetime
+import json
+from typing import Any
+
+import starlette_plus
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+__all__ = ("JSONResponse", "dumps", "loads")
+
+
+def _default(value: object) -> str:
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+
+    msg_ = f"Object of type {type(value).__name__} is not JSON serializable"
+    raise TypeError(msg_)
+
+
+def dumps(data: Any, /) -> bytes:  # noqa: ANN401 # anything JSON serializable
+    """Encode JSON, with orjson when the "speed" extra is installed.
+
+    Both encoders write compact JSON without escaping non ASCII characters, and datetimes in ISO 8601 format.
+
+    Returns
+    -------
+    :class:`bytes`
+    """
+    if orjson:
+        return orjson.dumps(data)
+
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=_default).encode()
+
+
+def loads(data: str | bytes, /) -> Any:  # noqa: ANN401 # anything JSON deserializable
+    """Decode JSON, with orjson when the "speed" extra is installed.
+
+    Returns
+    -------
+    Any
+
+    Raises
+    ------
+    json.JSONDecodeError
+        The data is not valid JSON, or not valid UTF-8.
+    """
+    if orjson:
+        return orjson.loads(data)
+
+    if isinstance(data, bytes):
+        try:
+            data = data.decode()
+        except UnicodeDecodeError as error:
+            msg_ = f"Invalid UTF-8: {error.reason}"
+            raise json.JSONDecodeError(msg_, "", error.start) from error
+
+    return json.loads(data)
+
+
+class JSONResponse(starlette_plus.JSONResponse):
+    """A JSON response encoded by :func:`dumps`.
+
+    Content which is already encoded, such as from :meth:`~core.models.BaseModel.json`, is sent as it is.
+    """
+
+    def render(self, content: Any) -> bytes:  # noqa: ANN401, PLR6301 # anything JSON serializable, overrides starlette
+        if isinstance(content, bytes):
+            return content
+
+        return dumps(content)
@@ -28,6 +28,7 @@ from starlette.staticfiles import StaticFiles
 
 from src.views import APIView, DocsView, HTMXView
 
+from .compression import CompressionMiddleware
 from .config import CONFIG
 from .database import Database
 
@@ -62,7 +63,13 @@ class Application(starlette_plus.Application):
         sess_redis = starlette_plus.Redis(url=session_url)
 
         global_limits = [CONFIG["LIMITS"]["global_limit"]]
+        compression = CONFIG.get("COMPRESSION", {})
         middleware = [
+            Middleware(
+                CompressionMiddleware,
+                minimum_size=compression.get("minimum_size", 500),
+                encodings=compression.get("encodings"),
+            ),
             Middleware(
                 starlette_plus.middleware.RatelimitMiddleware,
                 ignore_localhost=True,
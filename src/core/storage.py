@@ -0,0 +1,133 @@
+"""MystBin. Share code easily.
+
+Copyright (C) 2020-Current PythonistaGuild
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from __future__ import annotations
+
+import functools
+import importlib.util
+from typing import TYPE_CHECKING, NamedTuple
+
+# Part of the "compression" extra, only needed when files are stored compressed...
+HAS_ZSTANDARD: bool = importlib.util.find_spec("zstandard") is not None
+
+if TYPE_CHECKING or HAS_ZSTANDARD:
+    import zstandard
+
+
+__all__ = (
+    "HAS_ZSTANDARD",
+    "ContentStorage",
+    "compress_content",
+    "decompress_content",
+    "dictionary_id",
+    "is_registered",
+    "register_dictionary",
+)
+
+
+DEFAULT_LEVEL = 9
+
+# Dictionaries by their zstd id. Every frame names the dictionary it was compressed with...
+_dictionaries: dict[int, zstandard.ZstdCompressionDict] = {}
+
+
+class ContentStorage(NamedTuple):
+    """How new file content is compressed. Sent to the executor, so it only holds plain data."""
+
+    level: int = DEFAULT_LEVEL
+    dictionary: bytes | None = None
+
+
+def _require_zstandard() -> None:
+    if not HAS_ZSTANDARD:
+        msg_ = 'Compressed file storage requires the "zstandard" package, install the "compression" extra.'
+        raise RuntimeError(msg_)
+
+
+def register_dictionary(data: bytes, /) -> int:
+    """Make a dictionary available for decompression.
+
+    Returns
+    -------
+    :class:`int`
+        The zstd id of the dictionary.
+    """
+    _require_zstandard()
+
+    dictionary = zstandard.ZstdCompressionDict(data)
+    _dictionaries[dictionary.dict_id()] = dictionary
+    return dictionary.dict_id()
+
+
+def dictionary_id(data: bytes, /) -> int:
+    """Find the dictionary a compressed frame needs.
+
+    Returns
+    -------
+    :class:`int`
+        The zstd id of the dictionary, ``0`` when none was used.
+    """
+    _require_zstandard()
+    return zstandard.get_frame_parameters(data).dict_id
+
+
+def is_registered(identifier: int, /) -> bool:
+    return not identifier or identifier in _dictionaries
+
+
+@functools.lru_cache(maxsize=4)
+def _compression_dictionary(data: bytes, level: int) -> zstandard.ZstdCompressionDict:
+    # Prepared once per process, so a worker only pays for loading the dictionary the first time...
+    dictionary = zstandard.ZstdCompressionDict(data)
+    dictionary.precompute_compress(level=level)  # pyright: ignore[reportUnknownMemberType] # untyped in the stubs, returns nothing
+    return dictionary
+
+
+def compress_content(content: str, storage: ContentStorage, /) -> bytes:
+    """Compress file content for storage. This is CPU bound and is run in the executor with the other preparation.
+
+    Returns
+    -------
+    :class:`bytes`
+        A zstd frame which records the length of the content and the id of the dictionary used.
+    """
+    _require_zstandard()
+
+    if storage.dictionary:
+        compressor = zstandard.ZstdCompressor(dict_data=_compression_dictionary(storage.dictionary, storage.level))
+    else:
+        compressor = zstandard.ZstdCompressor(level=storage.level)
+
+    return compressor.compress(content.encode())
+
+
+def decompress_content(data: bytes, /) -> str:
+    """Decompress stored file content. The dictionary it was compressed with must have been registered.
+
+    Returns
+    -------
+    :class:`str`
+    """
+    identifier: int = dictionary_id(data)
+
+    if identifier:
+        decompressor = zstandard.ZstdDecompressor(dict_data=_dictionaries[identifier])
+    else:
+        decompressor = zstandard.ZstdDecompressor()
+
+    return decompressor.decompress(data).decode()
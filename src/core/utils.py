@@ -18,18 +18,50 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 from __future__ import annotations
 
+import codecs
 import datetime
+import email.utils
+import hashlib
 import json
 import re
 import secrets
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import starlette_plus
 
 from .config import CONFIG
+from .serialization import JSONResponse
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from .database import Database
+    from .models import PasteModel
 
 TOKEN_REGEX = re.compile(r"[a-zA-Z0-9_-]{23,28}\.[a-zA-Z0-9_-]{6,7}\.[a-zA-Z0-9_-]{27,}")
 
+# Request bodies are limited by what the [PASTES] limits allow, plus room for the rest of the body. A character is at
+# most four bytes of UTF-8 in multipart forms and plain text, and twelve when it is escaped: astral characters are
+# written as "\uXXXX\uXXXX" in JSON and as "%XX%XX%XX%XX" in URL encoded forms...
+_BODY_CHARACTERS: int = (CONFIG["PASTES"]["char_limit"] + CONFIG["PASTES"]["name_limit"]) * CONFIG["PASTES"]["file_limit"]
+BODY_LIMIT: int = CONFIG["PASTES"].get("body_limit", _BODY_CHARACTERS * 4 + 65_536)
+BODY_LIMITS: dict[str, int] = {
+    "application/json": CONFIG["PASTES"].get("body_limit", _BODY_CHARACTERS * 12 + 65_536),
+    "application/x-www-form-urlencoded": CONFIG["PASTES"].get("body_limit", _BODY_CHARACTERS * 12 + 65_536),
+}
+
+
+def body_limit(content_type: str | None, /) -> int:
+    """The size limit of a request body for a new paste with the given ``Content-Type``, see :data:`BODY_LIMITS`.
+
+    Returns
+    -------
+    :class:`int`
+        The limit in bytes, :data:`BODY_LIMIT` for content types that are not escaped.
+    """
+    media_type: str = (content_type or "").partition(";")[0].strip().lower()
+    return BODY_LIMITS.get(media_type, BODY_LIMIT)
+
 
 def generate_id(length: int = 9, /) -> str:
     return secrets.token_hex(length)
@@ -39,6 +71,112 @@ def generate_safety_token(length: int = 64, /) -> str:
     return secrets.token_urlsafe(length)
 
 
+def generate_etag(identifier: str, content_hashes: Iterable[str], /) -> str:
+    # Pastes are immutable, so the id and the hashes of the files, in order, identify every representation...
+    digest = hashlib.sha256(identifier.encode())
+
+    for content_hash in content_hashes:
+        digest.update(content_hash.encode())
+
+    return digest.hexdigest()[:32]
+
+
+def cache_headers(paste: PasteModel, /, *, tag: str, private: bool = False, relative: bool = False) -> dict[str, str]:
+    """Build the validators and ``Cache-Control`` header for a representation of a paste.
+
+    Parameters
+    ----------
+    paste: :class:`PasteModel`
+        The paste the response is built from.
+    tag: :class:`str`
+        Distinguishes the representations of one paste, e.g. ``"raw"`` or ``"api"``.
+    private: :class:`bool`
+        Whether the representation depends on the session and may only be kept by the browser.
+    relative: :class:`bool`
+        Whether the representation shows how long ago the paste was created. That text becomes part of the ETag and
+        no ``Last-Modified`` is sent, as the creation time alone can not tell when the text changes.
+
+    Returns
+    -------
+    dict[:class:`str`, :class:`str`]
+        The headers. Password protected pastes are never stored and get no validators.
+    """
+    if paste.has_password or paste.password:
+        return {"Cache-Control": "private, no-store"}
+
+    # Stored copies are revalidated before every use, so deleted pastes are not served from caches...
+    scope: str = "private" if private else "public"
+    headers: dict[str, str] = {"Cache-Control": f"{scope}, no-cache"}
+
+    created: datetime.datetime = paste.created_at.replace(tzinfo=datetime.UTC)
+
+    if relative:
+        age: str = natural_time(datetime.datetime.now(tz=datetime.UTC) - created)
+        tag = f"{tag}-{hashlib.sha256(age.encode()).hexdigest()[:8]}"
+    else:
+        headers["Last-Modified"] = email.utils.format_datetime(created, usegmt=True)
+
+    if paste.etag:
+        headers["ETag"] = f'"{paste.etag}-{tag}"'
+
+    return headers
+
+
+def is_fresh(request: starlette_plus.Request, paste: PasteModel, headers: dict[str, str], /) -> bool:
+    # If-None-Match takes precedence over If-Modified-Since, as in RFC 9110 13.2.2...
+    if_none_match: str | None = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        etag: str | None = headers.get("ETag")
+        tags: set[str] = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+
+        return etag is not None and ("*" in tags or etag in tags)
+
+    if_modified_since: str | None = request.headers.get("if-modified-since")
+    if if_modified_since is None or "Last-Modified" not in headers:
+        return False
+
+    try:
+        since: datetime.datetime = email.utils.parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=datetime.UTC)
+
+    return paste.created_at.replace(tzinfo=datetime.UTC, microsecond=0) <= since
+
+
+async def not_modified(  # noqa: PLR0913 # mirrors the options of cache_headers
+    request: starlette_plus.Request,
+    database: Database,
+    identifier: str,
+    /,
+    *,
+    tag: str,
+    private: bool = False,
+    relative: bool = False,
+) -> starlette_plus.Response | None:
+    """Answer a conditional request for a paste before any of its files are loaded.
+
+    Returns
+    -------
+    :class:`starlette_plus.Response` | None
+        A ``304 Not Modified`` response, or ``None`` when the request has to be served in full.
+    """
+    if "if-none-match" not in request.headers and "if-modified-since" not in request.headers:
+        return None
+
+    paste: PasteModel | None = await database.fetch_paste_info(identifier)
+    if not paste or paste.has_password or paste.password:
+        return None
+
+    headers: dict[str, str] = cache_headers(paste, tag=tag, private=private, relative=relative)
+    if not is_fresh(request, paste, headers):
+        return None
+
+    return starlette_plus.Response(status_code=304, headers=headers)
+
+
 async def json_or_text(request: starlette_plus.Request) -> dict[str, Any] | str:
     text: str = str(await request.body())
 
@@ -50,6 +188,48 @@ async def json_or_text(request: starlette_plus.Request) -> dict[str, Any] | str:
     return data
 
 
+def _too_large(limit: int, /) -> starlette_plus.Response:
+    return JSONResponse({"error": f'Paste exceeds the size limit of "{limit}" bytes.'}, status_code=413)
+
+
+async def read_body(request: starlette_plus.Request, /) -> bytes | starlette_plus.Response:
+    """Read the body of a new paste, giving up as soon as it is larger than :func:`body_limit` or not valid UTF-8.
+
+    The body is kept on the request, so :meth:`starlette_plus.Request.form` parses it without reading it again.
+
+    Returns
+    -------
+    :class:`bytes` | :class:`starlette_plus.Response`
+        The body, or an error response to send instead.
+    """
+    limit: int = body_limit(request.headers.get("content-type"))
+
+    length: str | None = request.headers.get("content-length")
+    if length and length.isdigit() and int(length) > limit:
+        return _too_large(limit)
+
+    decoder = codecs.getincrementaldecoder("UTF-8")()
+    chunks: list[bytes] = []
+    size: int = 0
+
+    try:
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > limit:
+                return _too_large(limit)
+
+            decoder.decode(chunk)
+            chunks.append(chunk)
+
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        return JSONResponse({"error": "Paste contains invalid UTF-8."}, status_code=400)
+
+    body: bytes = b"".join(chunks)
+    request._body = body  # noqa: SLF001 # pyright: ignore[reportPrivateUsage] # where starlette caches the body for form parsing
+    return body
+
+
 def validate_paste(data: dict[str, Any]) -> starlette_plus.Response | None:
     limit: int = CONFIG["PASTES"]["char_limit"]
     file_limit: int = CONFIG["PASTES"]["file_limit"]
@@ -57,10 +237,10 @@ def validate_paste(data: dict[str, Any]) -> starlette_plus.Response | None:
     try:
         files: list[dict[str, str | None]] = data["files"]
     except KeyError:
-        return starlette_plus.JSONResponse({"error": 'Missing the "files" parameter.'}, status_code=400)
+        return JSONResponse({"error": 'Missing the "files" parameter.'}, status_code=400)
 
     if len(files) > file_limit:
-        return starlette_plus.JSONResponse(
+        return JSONResponse(
             {"error": f'Paste exceeds the file limit of "{file_limit}" files.'},
             status_code=400,
         )
@@ -69,19 +249,19 @@ def validate_paste(data: dict[str, Any]) -> starlette_plus.Response | None:
         try:
             content: str | None = file["content"]
         except KeyError:
-            return starlette_plus.JSONResponse(
+            return JSONResponse(
                 {"error": f'The file at index "{index}" is missing the content parameter.'},
                 status_code=400,
             )
 
         if not content:
-            return starlette_plus.JSONResponse(
+            return JSONResponse(
                 {"error": f'The file at index "{index}" has no content.'},
                 status_code=400,
             )
 
         if len(content) > limit:
-            return starlette_plus.JSONResponse(
+            return JSONResponse(
                 {"error": f'The file at index "{index}" exceeds content size limits of "{limit}" characters.'},
                 status_code=400,
             )
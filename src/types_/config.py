@@ -16,7 +16,7 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
-from typing import NotRequired, TypedDict
+from typing import Literal, NotRequired, TypedDict
 
 import starlette_plus
 
@@ -30,10 +30,24 @@ class Server(TypedDict):
     domain: str
     session_secret: str
     maintenance: bool
+    workers: NotRequired[int]
 
 
 class Database(TypedDict):
     dsn: str
+    min_size: NotRequired[int]
+    max_size: NotRequired[int]
+    max_inactive_connection_lifetime: NotRequired[float]
+    statement_cache_size: NotRequired[int]
+    pgbouncer: NotRequired[bool]
+    replicas: NotRequired[list[str]]
+    replica_interval: NotRequired[float]
+    replica_max_lag: NotRequired[float]
+    views_interval: NotRequired[float]
+    reap_interval: NotRequired[float]
+    reap_batch: NotRequired[int]
+    leader_interval: NotRequired[float]
+    retention: NotRequired[float]
 
 
 class Redis(TypedDict):
@@ -41,6 +55,19 @@ class Redis(TypedDict):
     sessions: str
 
 
+class Cache(TypedDict):
+    max_bytes: int
+    ttl: float
+    local_ttl: NotRequired[float]
+    redis: NotRequired[str]
+
+
+class Compression(TypedDict):
+    minimum_size: NotRequired[int]
+    encodings: NotRequired[list[Literal["zstd", "br", "gzip"]]]
+    precompress: NotRequired[bool]
+
+
 class Limits(TypedDict):
     paste_get: starlette_plus.RateLimitData
     paste_get_day: starlette_plus.RateLimitData
@@ -53,17 +80,26 @@ class Pastes(TypedDict):
     char_limit: int
     file_limit: int
     name_limit: int
+    executor: NotRequired[Literal["thread", "process"]]
+    workers: NotRequired[int]
+    chunk_size: NotRequired[int]
+    storage: NotRequired[Literal["text", "zstd"]]
+    storage_level: NotRequired[int]
+    body_limit: NotRequired[int]
 
 
 class Github(TypedDict):
     token: str
     timeout: float
+    api_url: NotRequired[str]
 
 
 class Config(TypedDict):
     SERVER: Server
     DATABASE: Database
     REDIS: NotRequired[Redis]
+    CACHE: NotRequired[Cache]
+    COMPRESSION: NotRequired[Compression]
     LIMITS: Limits
     PASTES: Pastes
     GITHUB: NotRequired[Github]
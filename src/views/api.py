@@ -26,7 +26,8 @@ import asyncpg
 import starlette_plus
 
 from src.core import CONFIG
-from src.core.utils import validate_paste
+from src.core.serialization import JSONResponse, loads
+from src.core.utils import cache_headers, not_modified, read_body, validate_paste
 
 if TYPE_CHECKING:
     from src.core import Application
@@ -49,7 +50,11 @@ class APIView(starlette_plus.View, prefix="api"):
             Fetches a paste with all relevant meta-data and files.\n\n
 
             Fetching pastes does not include the `password` or `safety` fields. You only receive the `safety` field
-            directly after creating a paste.
+            directly after creating a paste.\n\n
+
+            Responses carry `ETag` and `Last-Modified` headers, send them back with `If-None-Match` or
+            `If-Modified-Since` to receive a `304` while the paste is unchanged. Password protected pastes are never
+            cached.
 
         Parameters
         ----------
@@ -107,6 +112,11 @@ class APIView(starlette_plus.View, prefix="api"):
                                                 type: integer
                                             annotation:
                                                 type: string
+                                            content_hash:
+                                                type: string
+
+            304:
+                description: The paste has not changed since the validators sent with the request.
 
             404:
                 description: The paste does not exist or has been previously deleted.
@@ -143,17 +153,20 @@ class APIView(starlette_plus.View, prefix="api"):
         password: str | None = request.headers.get("authorization", None)
         identifier: str = request.path_params["id"]
 
+        if resp := await not_modified(request, self.app.database, identifier, tag="api"):
+            return resp
+
         paste = await self.app.database.fetch_paste(identifier, password=password)
         if not paste:
-            return starlette_plus.JSONResponse(
+            return JSONResponse(
                 {"error": f'A paste with the id "{identifier}" could not be found or has expired.'}, status_code=404
             )
 
         if paste.has_password and not paste.password_ok:
-            return starlette_plus.JSONResponse({"error": "Unauthorized"}, status_code=401)
+            return JSONResponse({"error": "Unauthorized"}, status_code=401)
 
-        to_return: dict[str, Any] = paste.serialize(exclude=["safety", "password", "password_ok"])
-        return starlette_plus.JSONResponse(to_return)
+        to_return: bytes = paste.json(exclude=["safety", "password", "password_ok", "etag", "file_index"])
+        return JSONResponse(to_return, headers=cache_headers(paste, tag="api"))
 
     @starlette_plus.route("/paste", methods=["POST"])
     @starlette_plus.route("/pastes", methods=["POST"], include_in_schema=False)
@@ -240,6 +253,16 @@ class APIView(starlette_plus.View, prefix="api"):
                                 error:
                                     type: string
                                     example: The reason the paste was invalid.
+            413:
+                description: The request body is larger than any valid paste.
+                content:
+                    application/json:
+                        schema:
+                            type: object
+                            properties:
+                                error:
+                                    type: string
+                                    example: Paste exceeds the size limit of "18067036" bytes.
             429:
                 description: You are requesting too fast.
                 content:
@@ -255,13 +278,17 @@ class APIView(starlette_plus.View, prefix="api"):
         body: dict[str, Any] | str
         data: dict[str, Any]
 
+        raw: bytes | starlette_plus.Response = await read_body(request)
+        if isinstance(raw, starlette_plus.Response):
+            return raw
+
         if content_type == "application/json":
             try:
-                body = await request.json()
+                body = loads(raw)
             except json.JSONDecodeError:
-                return starlette_plus.JSONResponse({"error": "Invalid JSON provided."}, status_code=400)
+                return JSONResponse({"error": "Invalid JSON provided."}, status_code=400)
         else:
-            body = (await request.body()).decode(encoding="UTF-8")
+            body = raw.decode(encoding="UTF-8")
 
         data = {"files": [{"content": body, "filename": None}]} if isinstance(body, str) else body
 
@@ -273,7 +300,7 @@ class APIView(starlette_plus.View, prefix="api"):
         try:
             expiry: datetime.datetime | None = datetime.datetime.fromisoformat(expiry_str) if expiry_str else None
         except ValueError as e:
-            return starlette_plus.JSONResponse({"error": f'Unable to parse "expiry" parameter: {e}'}, status_code=400)
+            return JSONResponse({"error": f'Unable to parse "expiry" parameter: {e}'}, status_code=400)
 
         data["expires"] = expiry
         data["password"] = data.get("password")
@@ -282,22 +309,20 @@ class APIView(starlette_plus.View, prefix="api"):
             paste = await self.app.database.create_paste(data=data)
         except asyncpg.CharacterNotInRepertoireError:
             message: str = "File(s)/Filename(s) contain invalid characters or byte sequences."
-            return starlette_plus.JSONResponse({"error": message}, status_code=400)
-
-        to_return: dict[str, Any] = paste.serialize(exclude=["password", "password_ok"])
-        to_return.pop("files", None)
+            return JSONResponse({"error": message}, status_code=400)
 
-        return starlette_plus.JSONResponse(to_return, status_code=200)
+        to_return: bytes = paste.json(exclude=["password", "password_ok", "etag", "file_index", "files"])
+        return JSONResponse(to_return, status_code=200)
 
     @starlette_plus.route("/security/info/{token}")
     async def security_info(self, request: starlette_plus.Request) -> starlette_plus.Response:
         token: str | None = request.path_params.get("token", None)
         if not token:
-            return starlette_plus.JSONResponse({"error": "Unauthorized."}, status_code=401)
+            return JSONResponse({"error": "Unauthorized."}, status_code=401)
 
         paste = await self.app.database.fetch_paste_security(token=token)
         if not paste:
-            return starlette_plus.JSONResponse(
+            return JSONResponse(
                 {"error": "A paste was not found with the provided token, or has expired or been deleted."},
                 status_code=404,
             )
@@ -311,7 +336,7 @@ class APIView(starlette_plus.View, prefix="api"):
             "extra": "Visiting the delete URL will remove the paste instantly.",
         }
 
-        return starlette_plus.JSONResponse(data, status_code=200)
+        return JSONResponse(data, status_code=200)
 
     @starlette_plus.route("/security/delete/{token}", methods=["GET"])
     async def security_delete(self, request: starlette_plus.Request) -> starlette_plus.Response:
@@ -355,7 +380,7 @@ class APIView(starlette_plus.View, prefix="api"):
         """  # noqa: DOC102, DOC201 # openapi spec is generated from this docstring
         token: str | None = request.path_params.get("token", None)
         if not token:
-            return starlette_plus.JSONResponse({"error": "Unauthorized."}, status_code=401)
+            return JSONResponse({"error": "Unauthorized."}, status_code=401)
 
         await self.app.database.delete_paste_security(token=token)
         return starlette_plus.Response("Ok", status_code=200)
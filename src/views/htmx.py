@@ -19,7 +19,9 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 from __future__ import annotations
 
 import asyncio
+import bisect
 import datetime
+import itertools
 import json
 import pathlib
 from typing import TYPE_CHECKING, Any, cast
@@ -28,14 +30,23 @@ from urllib.parse import unquote, urlsplit
 import asyncpg
 import bleach
 import starlette_plus
+from starlette.responses import StreamingResponse
 
+from src.core.compression import compress, negotiate, supported
 from src.core.config import CONFIG
-from src.core.utils import natural_time, validate_paste
+from src.core.database import CHUNK_SIZE
+from src.core.escaping import escape_content
+from src.core.serialization import JSONResponse
+from src.core.utils import cache_headers, natural_time, not_modified, read_body, validate_paste
 
 if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Mapping, Sequence
+
     from starlette.datastructures import FormData
 
     from src.core import Application
+    from src.core.cache import PasteCache
+    from src.core.models import FileModel, PasteModel
 
 WEB_DIR = pathlib.Path(__file__).parent.parent / "web"
 HTML_FILE = WEB_DIR / "paste.html"
@@ -43,13 +54,35 @@ HTML_FILE = WEB_DIR / "paste.html"
 with HTML_FILE.open(encoding="utf-8") as fp:
     PASTE_HTML: str = fp.read()
 
+WARNING_CELL = '<td class="lineWarn"></td>'
+PRECOMPRESS: bool = CONFIG.get("COMPRESSION", {}).get("precompress", True)
+ENCODINGS: tuple[str, ...] = supported(CONFIG.get("COMPRESSION", {}).get("encodings"))
+
 
 class HTMXView(starlette_plus.View, prefix="htmx"):
     def __init__(self, app: Application) -> None:
         self.app: Application = app
+        # Compressions of raw pastes in progress by paste, variant and encoding, which concurrent misses wait for...
+        self._compressing: dict[tuple[str, str, str], asyncio.Task[bytes]] = {}
+
+    @staticmethod
+    def line_numbers(*, index: int, content: str, positions: Sequence[int]) -> str:
+        lines: list[str] = content.splitlines()
+        warned: set[int] = set()
+
+        if positions:
+            # Offsets of the start of every line, so the line of each warning position can be found with a bisect...
+            starts: list[int] = list(itertools.accumulate((len(line) + 1 for line in lines), initial=0))
+            warned = {bisect.bisect_right(starts, position) for position in positions}
+
+        return "\n".join(
+            f"""<tr data-ln="{n}"><td class="lineNumRow" onclick="highlightLine(event, '{index}', '{n}')">{n}</td>"""
+            f"""{WARNING_CELL if n in warned else ""}</tr>"""
+            for n in range(1, len(lines) + 1)
+        )
 
     @staticmethod
-    def highlight_code(*, files: list[dict[str, Any]]) -> str:
+    def highlight_code(*, files: Sequence[Mapping[str, Any]]) -> str:
         html: str = ""
 
         for index, file in enumerate(files):
@@ -58,7 +91,7 @@ class HTMXView(starlette_plus.View, prefix="htmx"):
 
             raw_url: str = f"/raw/{file['parent_id']}"
             annotation: str = file["annotation"] or ""
-            positions: list[int] = file.get("warning_positions", [])
+            positions: list[int] = file.get("warning_positions") or []
             original: str = file["content"]
 
             parts: list[str] = annotation.split(":")
@@ -73,43 +106,10 @@ class HTMXView(starlette_plus.View, prefix="htmx"):
                 f'<small class="annotations">❌ {annotation}{": " + extra if extra else ""}</small>' if annotation else ""
             )
 
-            position: int = 0
-            next_pos: int | None = positions.pop(0) if positions else None
-
-            numbers: list[str] = []
-            for n, line in enumerate(original.splitlines(), 1):
-                length: int = len(line)
-
-                if next_pos is not None and position <= next_pos <= position + length:
-                    numbers.append(
-                        rf"""
-                        <tr data-ln="{n}"><td class="lineNumRow"
-                        onclick="highlightLine(event, '{index}', '{n}')">{n}</td><td class="lineWarn"></td></tr>"""
-                    )
-
-                    try:
-                        next_pos = positions.pop(0)
-                    except IndexError:
-                        next_pos = None
-
-                else:
-                    numbers.append(
-                        rf"""
-                        <tr data-ln="{n}"><td class="lineNumRow"
-                        onclick="highlightLine(event, '{index}', '{n}')">{n}</td></tr>
-                        """
-                    )
-
-                position += length + 1
-
-            content = bleach.clean(
-                original.replace("<!", "&lt;&#33;").replace("&#xa;", "&amp;#xa;"),
-                attributes=[],
-                tags=[],
-                strip_comments=False,
-            )
+            numbers: str = HTMXView.line_numbers(index=index, content=original, positions=positions)
+            content: str = escape_content(original)
 
-            lines: str = f"""<table class="lineNums"><tbody>\n{"".join(numbers)}\n</tbody></table>"""
+            lines: str = f"""<table class="lineNums"><tbody>\n{numbers}\n</tbody></table>"""
             html += f"""
             <div id="__paste_a_{index}" class="pasteArea">
                 <div class="pasteHeader">
@@ -127,6 +127,92 @@ class HTMXView(starlette_plus.View, prefix="htmx"):
 
         return html
 
+    async def stream_files(self, files: Sequence[FileModel], *, titled: bool) -> AsyncIterator[str]:
+        # Files are fetched with only their first chunk of content, the remainder is read as the response is sent...
+        for index, file in enumerate(files):
+            if index:
+                yield "\n\n\n\n"
+
+            if titled:
+                yield f"# MystBin ! - {file.filename}\n"
+
+            yield file.content
+
+            if len(file.content) < file.charcount:
+                async for chunk in self.app.database.read_file(file.parent_id, file.index, start=len(file.content)):
+                    yield chunk
+
+    async def precompressed(
+        self,
+        request: starlette_plus.Request,
+        paste: PasteModel,
+        *,
+        variant: str,
+        titled: bool,
+        headers: dict[str, str],
+    ) -> starlette_plus.Response | None:
+        # Raw pastes never change, so they are compressed once, harder than streamed responses, and kept with the cache...
+        cache: PasteCache | None = self.app.database.cache
+        if not cache or not PRECOMPRESS or paste.has_password or paste.password:
+            return None
+
+        encoding: str | None = negotiate(request.headers.get("accept-encoding", ""), encodings=ENCODINGS)
+        if not encoding:
+            return None
+
+        body: bytes | None = await cache.get_encoded(paste.id, variant, encoding)
+        if body is None:
+            # Files too large to be read in one go keep being streamed...
+            if any(len(file.content) < file.charcount for file in paste.files):
+                return None
+
+            key: tuple[str, str, str] = (paste.id, variant, encoding)
+            task: asyncio.Task[bytes] | None = self._compressing.get(key)
+
+            if task is None:
+                task = asyncio.create_task(
+                    self.compress_raw(cache, paste, variant=variant, encoding=encoding, titled=titled)
+                )
+                task.add_done_callback(lambda _: self._compressing.pop(key, None))
+                self._compressing[key] = task
+
+            # A request that goes away leaves the compression to finish for the others...
+            body = await asyncio.shield(task)
+
+        encoded: dict[str, str] = {**headers, "Content-Encoding": encoding, "Vary": "Accept-Encoding"}
+        if etag := headers.get("ETag"):
+            encoded["ETag"] = "W/" + etag
+
+        return starlette_plus.Response(body, media_type="text/plain", headers=encoded)
+
+    async def compress_raw(
+        self,
+        cache: PasteCache,
+        paste: PasteModel,
+        *,
+        variant: str,
+        encoding: str,
+        titled: bool,
+    ) -> bytes:
+        content: str = "".join([chunk async for chunk in self.stream_files(paste.files, titled=titled)])
+        body: bytes = await asyncio.to_thread(compress, content.encode(), encoding)
+        await cache.set_encoded(paste, variant, encoding, body)
+
+        return body
+
+    async def render_files(self, paste: PasteModel) -> str:
+        # Paste content never changes, so the files are only rendered once and served from the cache afterwards...
+        cache: PasteCache | None = self.app.database.cache
+
+        if cache and (rendered := await cache.get_rendered(paste.id)) is not None:
+            return rendered
+
+        rendered = await asyncio.to_thread(self.highlight_code, files=paste.files)
+        if cache:
+            await cache.set_rendered(paste, rendered)
+
+        return rendered
+
     @staticmethod
     def check_discord(request: starlette_plus.Request) -> starlette_plus.Response | None:
         agent: str = request.headers.get("user-agent", "")
@@ -151,7 +237,7 @@ class HTMXView(starlette_plus.View, prefix="htmx"):
     @starlette_plus.route("/{id}", prefix=False)
     @starlette_plus.limit(**CONFIG["LIMITS"]["paste_get"])
     @starlette_plus.limit(**CONFIG["LIMITS"]["paste_get_day"])
-    async def paste(self, request: starlette_plus.Request) -> starlette_plus.Response:
+    async def paste(self, request: starlette_plus.Request) -> starlette_plus.Response:  # noqa: PLR0911
         if resp := self.check_discord(request=request):
             return resp
 
@@ -168,6 +254,13 @@ class HTMXView(starlette_plus.View, prefix="htmx"):
             </div>
         """
 
+        # The security link is only rendered for the creator, so they get their own validators...
+        stored: list[str] = request.session.get("pastes", [])
+        tag: str = "html-owner" if identifier in stored else "html"
+
+        if resp := await not_modified(request, self.app.database, identifier, tag=tag, private=True, relative=True):
+            return resp
+
         password: str = unquote(request.query_params.get("pastePassword", ""))
         paste = await self.app.database.fetch_paste(identifier, password=password)
 
@@ -184,8 +277,6 @@ class HTMXView(starlette_plus.View, prefix="htmx"):
                 headers=error_headers,
             )
 
-        data: dict[str, Any] = paste.serialize(exclude=["password", "password_ok"])
-        files: list[dict[str, Any]] = data["files"]
         created_delta: datetime.timedelta = datetime.datetime.now(tz=datetime.UTC) - paste.created_at.replace(
             tzinfo=datetime.UTC
         )
@@ -194,9 +285,8 @@ class HTMXView(starlette_plus.View, prefix="htmx"):
         raw_url: str = f"/raw/{identifier}"
         security_html: str = ""
 
-        stored: list[str] = request.session.get("pastes", [])
         if identifier in stored:
-            security_url: str = f"/api/security/info/{data['safety']}"
+            security_url: str = f"/api/security/info/{paste.safety}"
 
             security_html = f"""
             <div class="identifierHeaderSection">
@@ -217,11 +307,15 @@ class HTMXView(starlette_plus.View, prefix="htmx"):
         </div>
         """
 
-        html += await asyncio.to_thread(self.highlight_code, files=files)
+        html += await self.render_files(paste)
         if htmx_url and password:
             return starlette_plus.HTMLResponse(html, headers={"HX-Replace-Url": f"{url}?pastePassword={password}"})
 
-        return starlette_plus.HTMLResponse(PASTE_HTML.format(__PASTES__=html), media_type="text/html")
+        return starlette_plus.HTMLResponse(
+            PASTE_HTML.format(__PASTES__=html),
+            media_type="text/html",
+            headers=cache_headers(paste, tag=tag, private=True, relative=True),
+        )
 
     @starlette_plus.route("/raw/{id}", prefix=False)
     @starlette_plus.limit(**CONFIG["LIMITS"]["paste_get"])
@@ -238,31 +332,35 @@ class HTMXView(starlette_plus.View, prefix="htmx"):
             identifier = htmx_url.removeprefix(f"{request.url.scheme}://{request.url.hostname}/")
 
         headers: dict[str, str] = {"HX-Redirect": f"/raw/{identifier}"}
-        paste = await self.app.database.fetch_paste(identifier, password=password)
+        if resp := await not_modified(request, self.app.database, identifier, tag="raw"):
+            return resp
+
+        paste = await self.app.database.fetch_paste(identifier, password=password, limit=CHUNK_SIZE)
 
         if not paste:
-            return starlette_plus.JSONResponse(
+            return JSONResponse(
                 {"error": f'A paste with the id "{identifier}" could not be found or has expired.'},
                 status_code=404,
                 headers=headers,
             )
 
         if paste.has_password and not paste.password_ok:
-            return starlette_plus.JSONResponse(
+            return JSONResponse(
                 {"error": "Unauthorized. Raw pastes can not be viewed when protected by passwords."},
                 status_code=401,
                 headers=headers,
             )
 
-        to_return: dict[str, Any] = paste.serialize(exclude=["safety", "password", "password_ok"])
-        text: str = "\n\n\n\n".join([f"# MystBin ! - {f['filename']}\n{f['content']}" for f in to_return["files"]])
+        headers |= cache_headers(paste, tag="raw")
+        if resp := await self.precompressed(request, paste, variant="raw", titled=True, headers=headers):
+            return resp
 
-        return starlette_plus.PlainTextResponse(text, headers=headers)
+        return StreamingResponse(self.stream_files(paste.files, titled=True), media_type="text/plain", headers=headers)
 
     @starlette_plus.route("/raw/{id}/{page:int}", prefix=False)
     @starlette_plus.limit(**CONFIG["LIMITS"]["paste_get"])
     @starlette_plus.limit(**CONFIG["LIMITS"]["paste_get_day"])
-    async def paste_raw_page(self, request: starlette_plus.Request) -> starlette_plus.Response:
+    async def paste_raw_page(self, request: starlette_plus.Request) -> starlette_plus.Response:  # noqa: PLR0911
         if resp := self.check_discord(request=request):
             return resp
 
@@ -270,27 +368,33 @@ class HTMXView(starlette_plus.View, prefix="htmx"):
         identifier: str = request.path_params["id"]
         page: int = max(request.path_params["page"], 1)
 
-        paste = await self.app.database.fetch_paste(identifier, password=password)
+        if resp := await not_modified(request, self.app.database, identifier, tag=f"raw-{page}"):
+            return resp
+
+        paste = await self.app.database.fetch_paste_file(identifier, page, password=password, limit=CHUNK_SIZE)
         if not paste:
-            return starlette_plus.JSONResponse(
+            return JSONResponse(
                 {"error": f'A paste with the id "{identifier}" could not be found or has expired.'},
                 status_code=404,
             )
 
         if paste.has_password and not paste.password_ok:
-            return starlette_plus.JSONResponse(
+            return JSONResponse(
                 {"error": "Unauthorized. Raw pastes can not be viewed when protected by passwords."},
                 status_code=401,
             )
 
-        to_return: dict[str, Any] = paste.serialize(exclude=["safety", "password", "password_ok"])
+        if not paste.files:
+            return JSONResponse(
+                {"error": f"This file does not exist on paste: '{identifier}'"},
+                status_code=404,
+            )
 
-        try:
-            text: str = to_return["files"][page - 1]["content"]
-        except IndexError:
-            return starlette_plus.JSONResponse({"error": f"This file does not exist on paste: '{identifier}'"})
+        headers: dict[str, str] = cache_headers(paste, tag=f"raw-{page}")
+        if resp := await self.precompressed(request, paste, variant=f"raw-{page}", titled=False, headers=headers):
+            return resp
 
-        return starlette_plus.PlainTextResponse(text)
+        return StreamingResponse(self.stream_files(paste.files, titled=False), media_type="text/plain", headers=headers)
 
     @starlette_plus.route("/save", methods=["POST"])
     @starlette_plus.limit(**CONFIG["LIMITS"]["paste_post"])
@@ -299,15 +403,24 @@ class HTMXView(starlette_plus.View, prefix="htmx"):
         if resp := self.check_discord(request=request):
             return resp
 
-        form: FormData = await request.form()
+        error_headers: dict[str, str] = {"HX-Retarget": "#errorResponse"}
+
+        body: bytes | starlette_plus.Response = await read_body(request)
+        if isinstance(body, starlette_plus.Response):
+            error: dict[str, Any] = json.loads(body.body)  # type: ignore Can only be memoryview when specifically used.
+            return starlette_plus.HTMLResponse(
+                f"""<span id="errorResponse">{body.status_code}: {error["error"]}</span>""",
+                headers=error_headers,
+            )
+
+        # The body is within its limit already, starlette would refuse fields over 1 MB otherwise...
+        form: FormData = await request.form(max_part_size=len(body))
         multi = form.multi_items()
 
         password: str = cast("str", multi.pop()[1])
         names: list[str] = cast("list[str]", [i[1] for i in multi if i[0] == "fileName"])
         contents: list[str] = cast("list[str]", [i[1] for i in multi if i[0] == "fileContent"])
 
-        error_headers: dict[str, str] = {"HX-Retarget": "#errorResponse"}
-
         if len(names) != len(contents):
             return starlette_plus.HTMLResponse(
                 """<span id="errorResponse">400: Invalidated paste data.</span>""",
@@ -355,7 +468,7 @@ class HTMXView(starlette_plus.View, prefix="htmx"):
                 headers=error_headers,
             )
 
-        to_return: dict[str, Any] = paste.serialize(exclude=["password", "password_ok"])
+        to_return: dict[str, Any] = paste.serialize(exclude=["password", "password_ok", "etag"])
         identifier: str = to_return["id"]
 
         url: str = f"/{identifier}"
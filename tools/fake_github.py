@@ -0,0 +1,137 @@
+"""MystBin. Share code easily.
+
+Copyright (C) 2020-Current PythonistaGuild
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+A stand in for the GitHub gist API, to try out token invalidation without posting public gists.
+Set ``api_url`` of ``[GITHUB]`` to its address and run it from the repository root::
+
+    python -m tools.fake_github --port 8765
+    python -m tools.fake_github --limit 2 --reset 60  # rate limit after 2 gists, for 60 seconds
+    python -m tools.fake_github --fail 3             # answer the first 3 posts with a server error
+
+Gists are kept in memory and listed by ``GET /gists``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import sys
+import time
+from typing import Any
+
+from aiohttp import web
+
+# The largest gist file GitHub shows in full...
+MAX_FILE_SIZE = 1_000_000
+
+
+class FakeGitHub:
+    def __init__(self, *, token: str | None, limit: int | None, reset: float, fail: int) -> None:
+        self.token: str | None = token
+        self.limit: int | None = limit
+        self.reset: float = reset
+        self.fail: int = fail
+        self.gists: list[dict[str, Any]] = []
+        self._ids = itertools.count(1)
+        self._window: float = time.time() + reset
+        self._used: int = 0
+
+    def _rate_limited(self) -> web.Response | None:
+        if self.limit is None:
+            return None
+
+        if time.time() >= self._window:
+            self._window = time.time() + self.reset
+            self._used = 0
+
+        self._used += 1
+        if self._used <= self.limit:
+            return None
+
+        headers: dict[str, str] = {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(int(self._window) + 1)}
+        return web.json_response({"message": "API rate limit exceeded"}, status=403, headers=headers)
+
+    async def create(self, request: web.Request) -> web.Response:
+        if self.fail > 0:
+            self.fail -= 1
+            return web.json_response({"message": "Server Error"}, status=502)
+
+        if self.token and request.headers.get("Authorization") != f"Bearer {self.token}":
+            return web.json_response({"message": "Bad credentials"}, status=401)
+
+        if limited := self._rate_limited():
+            return limited
+
+        try:
+            payload: dict[str, Any] = await request.json()
+        except json.JSONDecodeError:
+            return web.json_response({"message": "Problems parsing JSON"}, status=400)
+
+        files: dict[str, dict[str, str]] = payload.get("files") or {}
+        if not files or not all(f.get("content") for f in files.values()):
+            return web.json_response({"message": "Validation Failed", "errors": ["files are missing content"]}, status=422)
+
+        identifier: str = f"{next(self._ids):032x}"
+        url: str = f"http://{request.host}/gists/{identifier}"
+        sizes: dict[str, int] = {name: len(f["content"].encode()) for name, f in files.items()}
+        gist: dict[str, Any] = {
+            "id": identifier,
+            "url": url,
+            "html_url": url,
+            "public": payload.get("public", False),
+            "description": payload.get("description"),
+            "files": {
+                name: {"filename": name, "size": size, "truncated": size > MAX_FILE_SIZE} for name, size in sizes.items()
+            },
+        }
+        self.gists.append(gist | {"content": {name: f["content"] for name, f in files.items()}})
+
+        lines: int = sum(f["content"].count("\n") + 1 for f in files.values())
+        print(f"Created gist {identifier} with {len(files)} files and {lines} lines.")
+        return web.json_response(gist, status=201)
+
+    async def list(self, _: web.Request) -> web.Response:
+        return web.json_response(self.gists)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m tools.fake_github",
+        description="A stand in for the GitHub gist API.",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="port to listen on (default: 8765)")
+    parser.add_argument("--token", help="only accept this token (default: any)")
+    parser.add_argument("--limit", type=int, help="gists accepted per rate limit window (default: unlimited)")
+    parser.add_argument("--reset", type=float, default=60, help="seconds in a rate limit window (default: 60)")
+    parser.add_argument("--fail", type=int, default=0, help="posts answered with a server error first (default: 0)")
+    args = parser.parse_args()
+
+    github = FakeGitHub(token=args.token, limit=args.limit, reset=args.reset, fail=args.fail)
+
+    app = web.Application()
+    app.router.add_post("/gists", github.create)
+    app.router.add_get("/gists", github.list)
+
+    web.run_app(app, host=args.host, port=args.port, print=print)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+"""MystBin. Share code easily.
+
+Copyright (C) 2020-Current PythonistaGuild
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Maintenance of the compressed file storage, see the ``storage`` key of ``[PASTES]``.
+
+Run from the repository root with your ``config.toml`` available::
+
+    python -m tools.storage train      # train a zstd dictionary on existing files
+    python -m tools.storage compress   # compress files stored as text, in batches
+    python -m tools.storage decompress # store compressed files as text again
+
+Servers only pick up a newly trained dictionary for new files when they are restarted.
+Both migrations can run next to live servers and be stopped and resumed at any time.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import functools
+import sys
+import time
+from typing import TYPE_CHECKING
+
+import asyncpg
+
+from src.core.config import CONFIG
+from src.core.storage import HAS_ZSTANDARD, ContentStorage, compress_content, decompress_content, register_dictionary
+
+if TYPE_CHECKING or HAS_ZSTANDARD:
+    import zstandard
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+
+SAMPLE_BYTES = 16_384
+
+
+async def connect() -> asyncpg.Connection[asyncpg.Record]:
+    connection: asyncpg.Connection[asyncpg.Record] = await asyncpg.connect(CONFIG["DATABASE"]["dsn"])
+
+    for record in await connection.fetch("SELECT data FROM content_dictionaries ORDER BY created_at"):
+        register_dictionary(record["data"])
+
+    return connection
+
+
+async def train(*, samples: int, size: int) -> int:
+    # Only the start of each file is sampled, it is representative enough and keeps the training set small...
+    query: str = """
+        SELECT convert_to(substring(content FOR $2), 'UTF8') AS sample FROM file_contents
+        WHERE content IS NOT NULL ORDER BY random() LIMIT $1
+    """
+
+    connection = await connect()
+    try:
+        rows: list[bytes] = [r["sample"] for r in await connection.fetch(query, samples, SAMPLE_BYTES)]
+        if len(rows) < 10:
+            print(f"Only {len(rows)} files are stored as text, which is not enough to train a dictionary.")
+            return 1
+
+        start: float = time.perf_counter()
+        # A new list, as the stubs take a list of ByteString which a list of bytes is not...
+        dictionary = zstandard.train_dictionary(size, [*rows])
+        print(f"Trained dictionary {dictionary.dict_id()} on {len(rows)} files in {time.perf_counter() - start:.1f}s.")
+
+        await connection.execute(
+            "INSERT INTO content_dictionaries (id, data) VALUES ($1, $2) ON CONFLICT DO NOTHING",
+            dictionary.dict_id(),
+            dictionary.as_bytes(),
+        )
+    finally:
+        await connection.close()
+
+    print("Restart the servers to compress new files with it.")
+    return 0
+
+
+async def migrate(
+    *,
+    select: str,
+    update: str,
+    convert: Callable[[list[asyncpg.Record]], list[str] | list[bytes]],
+    batch: int,
+    pause: float,
+) -> int:
+    # Rows are locked while a batch is converted, and SKIP LOCKED leaves rows used by anyone else for a later batch...
+    loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+    connection = await connect()
+    total: int = 0
+
+    try:
+        while True:
+            async with connection.transaction():
+                rows: list[asyncpg.Record] = await connection.fetch(select, batch)
+                if not rows:
+                    break
+
+                values: list[str] | list[bytes] = await loop.run_in_executor(None, convert, rows)
+                await connection.execute(update, [r["hash"] for r in rows], values)
+
+            total += len(rows)
+            print(f"Converted {total} files...")
+            await asyncio.sleep(pause)
+    finally:
+        await connection.close()
+
+    print(f"Done, {total} files were converted.")
+    return 0
+
+
+def compress_rows(rows: list[asyncpg.Record], /, *, storage: ContentStorage) -> list[bytes]:
+    return [compress_content(r["content"], storage) for r in rows]
+
+
+def decompress_rows(rows: list[asyncpg.Record], /) -> list[str]:
+    return [decompress_content(r["compressed"]) for r in rows]
+
+
+async def compress(*, batch: int, pause: float) -> int:
+    connection = await connect()
+    try:
+        dictionary: bytes | None = await connection.fetchval(
+            "SELECT data FROM content_dictionaries ORDER BY created_at DESC LIMIT 1"
+        )
+    finally:
+        await connection.close()
+
+    storage = ContentStorage(level=CONFIG["PASTES"].get("storage_level", 9), dictionary=dictionary)
+    print(f"Compressing at level {storage.level}, {'with' if dictionary else 'without'} a dictionary.")
+
+    return await migrate(
+        select="""
+            SELECT hash, content FROM file_contents
+            WHERE content IS NOT NULL LIMIT $1 FOR UPDATE SKIP LOCKED
+        """,
+        update="""
+            UPDATE file_contents SET compressed = u.compressed, content = NULL
+            FROM unnest($1::text[], $2::bytea[]) AS u(hash, compressed) WHERE file_contents.hash = u.hash
+        """,
+        convert=functools.partial(compress_rows, storage=storage),
+        batch=batch,
+        pause=pause,
+    )
+
+
+async def decompress(*, batch: int, pause: float) -> int:
+    return await migrate(
+        select="""
+            SELECT hash, compressed FROM file_contents
+            WHERE compressed IS NOT NULL LIMIT $1 FOR UPDATE SKIP LOCKED
+        """,
+        update="""
+            UPDATE file_contents SET content = u.content, compressed = NULL
+            FROM unnest($1::text[], $2::text[]) AS u(hash, content) WHERE file_contents.hash = u.hash
+        """,
+        convert=decompress_rows,
+        batch=batch,
+        pause=pause,
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m tools.storage",
+        description="Maintenance of the compressed file storage.",
+    )
+    parser.add_argument("command", choices=["train", "compress", "decompress"])
+    parser.add_argument("--samples", type=int, default=5_000, help="files sampled to train on (default: 5000)")
+    parser.add_argument("--size", type=int, default=112_640, help="size of a trained dictionary in bytes (default: 112640)")
+    parser.add_argument("--batch", type=int, default=200, help="files converted per transaction (default: 200)")
+    parser.add_argument("--pause", type=float, default=0.1, help="seconds to sleep between batches (default: 0.1)")
+    args = parser.parse_args()
+
+    if not HAS_ZSTANDARD:
+        print('The "zstandard" package is required, install the "compression" extra.')
+        return 1
+
+    if args.command == "train":
+        return asyncio.run(train(samples=args.samples, size=args.size))
+
+    if args.command == "compress":
+        return asyncio.run(compress(batch=args.batch, pause=args.pause))
+
+    return asyncio.run(decompress(batch=args.batch, pause=args.pause))
+
+
+if __name__ == "__main__":
+    sys.exit(main())